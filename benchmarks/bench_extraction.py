@@ -0,0 +1,306 @@
+"""Offline benchmarks and drift checks for the extraction hot paths.
+
+Runs the search, tile, posting and Telegram message functions of upwork-job-search-alerts.py
+against the HTML fixtures in benchmarks/fixtures, once for each available BeautifulSoup parser. Fixtures marked
+"synthetic" in the manifest were written by hand; "capture" fixtures are real pages added with --add.
+
+    python benchmarks/bench_extraction.py                 # benchmark every parser
+    python benchmarks/bench_extraction.py --check         # fail if extracted fields drift from the fixtures, or if
+                                                          # the fast path's embedded data disagrees with the tiles
+    python benchmarks/bench_extraction.py --update        # re-record expected fields after a deliberate change
+    python benchmarks/bench_extraction.py --add debug/search_html/<file>.html.gz --kind search
+    python benchmarks/bench_extraction.py --add saved_search.html --kind search --keep-state
+"""
+import argparse
+import gzip
+import importlib.util
+import json
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPT = os.path.join(ROOT, "upwork-job-search-alerts.py")
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+MANIFEST = os.path.join(FIXTURES, "manifest.json")
+
+
+def load_alerts_module():
+    spec = importlib.util.spec_from_file_location("upwork_job_search_alerts", SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    # The extraction code logs with print, which would dominate the timings
+    module.print = lambda *args, **kwargs: None
+    # Fixtures with old markup trip the drift warning, which must not reach Telegram
+    module.SELECTOR_DRIFT_ALERTS = False
+    return module
+
+
+def available_parsers():
+    parsers = []
+    try:
+        import lxml  # noqa: F401
+        parsers.append("lxml")
+    except ImportError:
+        pass
+    parsers.append("html.parser")
+    return parsers
+
+
+def load_manifest():
+    with open(MANIFEST, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_manifest(manifest):
+    with open(MANIFEST, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+        f.write("\n")
+
+
+def read_fixture(fixture):
+    with open(os.path.join(FIXTURES, fixture["kind"], fixture["file"]), encoding="utf-8") as f:
+        return f.read()
+
+
+def expected_path(fixture):
+    return os.path.join(FIXTURES, "expected", os.path.splitext(fixture["file"])[0] + ".json")
+
+
+def posting_stub(fixture):
+    return {"job_uid": fixture["file"], "title": "Fixture job", "url": "https://www.upwork.com/jobs/~fixture"}
+
+
+def extract_fixture(module, fixture, html_content):
+    if fixture["kind"] == "search":
+        return module.extract_jobs_from_search(html_content)
+    job_info = module.extract_job_info_from_posting(html_content, posting_stub(fixture))
+    return {field: job_info[field] for field in module.POSTING_FIELDS + ["full_details_fetched"] if field in job_info}
+
+
+def diff_fields(expected, actual, path=""):
+    if isinstance(expected, dict) and isinstance(actual, dict):
+        differences = []
+        for key in sorted(set(expected) | set(actual)):
+            differences += diff_fields(expected.get(key), actual.get(key), f"{path}.{key}" if path else key)
+        return differences
+    if isinstance(expected, list) and isinstance(actual, list) and not all(isinstance(x, str) for x in expected + actual):
+        differences = []
+        if len(expected) != len(actual):
+            differences.append(f"{path}: expected {len(expected)} items, got {len(actual)}")
+        for index, (exp, act) in enumerate(zip(expected, actual)):
+            differences += diff_fields(exp, act, f"{path}[{index}]")
+        return differences
+    if expected != actual:
+        return [f"{path}: expected {expected!r}, got {actual!r}"]
+    return []
+
+
+# Fields the HTTP fast path reads from Upwork's embedded page data, which must agree with the job tiles.
+# Not the url: tile links carry a slug and referrer, while the fast path builds them from the ciphertext
+STATE_FIELDS = ["job_uid", "title", "job_type", "budget", "experience_level", "skills"]
+
+
+def check_embedded_state(module, fixture, html_content):
+    # The fast path is only trustworthy once a recorded page shows its state keys find the same jobs as the tiles
+    state = module.extract_embedded_state(html_content)
+    if state is None:
+        return None
+    tiles = module.extract_jobs_from_search(html_content)
+    from_state = {job["job_uid"]: job for job in module.extract_jobs_from_state(state)}
+    differences = []
+    for index, tile in enumerate(tiles):
+        job = from_state.pop(tile["job_uid"], None)
+        if job is None:
+            differences.append(f"[{index}] {tile['job_uid']}: tile has no match in the embedded state")
+            continue
+        differences += diff_fields({f: tile.get(f) for f in STATE_FIELDS}, {f: job.get(f) for f in STATE_FIELDS},
+                                   f"[{index}]")
+    differences += [f"{uid}: embedded state job has no tile" for uid in from_state]
+    return differences
+
+
+def check(module, manifest, update=False):
+    failures = 0
+    state_checked = 0
+    for parser in available_parsers():
+        module.BS4_PARSER = parser
+        for fixture in manifest["fixtures"]:
+            actual = extract_fixture(module, fixture, read_fixture(fixture))
+            path = expected_path(fixture)
+            if update:
+                if parser == available_parsers()[0]:
+                    with open(path, "w", encoding="utf-8") as f:
+                        json.dump(actual, f, indent=2, ensure_ascii=False)
+                        f.write("\n")
+                    print(f"Recorded {os.path.relpath(path, ROOT)}")
+                continue
+
+            with open(path, encoding="utf-8") as f:
+                expected = json.load(f)
+            differences = diff_fields(expected, actual)
+            if differences:
+                failures += 1
+                print(f"DRIFT [{parser}] {fixture['file']}:")
+                for line in differences:
+                    print(f"  {line}")
+            else:
+                print(f"ok    [{parser}] {fixture['file']}")
+
+            if fixture["kind"] == "search":
+                differences = check_embedded_state(module, fixture, read_fixture(fixture))
+                if differences is None:
+                    continue
+                state_checked += 1
+                if differences:
+                    failures += 1
+                    print(f"STATE [{parser}] {fixture['file']}: fast path disagrees with the job tiles")
+                    for line in differences:
+                        print(f"  {line}")
+                else:
+                    print(f"ok    [{parser}] {fixture['file']} (embedded state)")
+
+    if not update:
+        print(f"\nFixture set v{manifest['version']}: {failures} drifted")
+        if not state_checked:
+            print("No search fixture carries embedded page data, so the HTTP fast path is unverified")
+        if not any(fixture.get("origin") == "capture" for fixture in manifest["fixtures"]):
+            print("Every fixture is synthetic, add a real page with --add to check against live markup")
+    return failures
+
+
+def measure(func, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    elapsed = time.perf_counter() - start
+
+    # Memory is traced in a separate run because tracemalloc slows the code down several times over
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def benchmark(module, manifest, iterations):
+    searches = [(f, read_fixture(f)) for f in manifest["fixtures"] if f["kind"] == "search"]
+    postings = [(f, read_fixture(f)) for f in manifest["fixtures"] if f["kind"] == "posting"]
+
+    print(f"Fixture set v{manifest['version']}, {iterations} iterations per benchmark\n")
+    print(f"{'parser':<12} {'benchmark':<32} {'rate':>16} {'peak memory':>14}")
+
+    for parser in available_parsers():
+        module.BS4_PARSER = parser
+        tiles = [tile for _, html_content in searches for tile in module.parse_search_tiles(html_content)]
+        jobs = [job for _, html_content in searches for job in module.extract_jobs_from_search(html_content)]
+        for job, (_, html_content) in zip(jobs, postings * len(jobs)):
+            module.extract_job_info_from_posting(html_content, job)
+
+        def run_searches():
+            for _, html_content in searches:
+                module.extract_jobs_from_search(html_content)
+
+        def run_tiles():
+            for tile in tiles:
+                module.extract_job_info_from_search(tile)
+
+        def run_postings():
+            for fixture, html_content in postings:
+                module.extract_job_info_from_posting(html_content, posting_stub(fixture))
+
+        def run_messages():
+            for job in jobs:
+                module.create_telegram_message(job)
+
+        results = [
+            ("extract_jobs_from_search", run_searches, len(tiles), "tiles/s"),
+            ("extract_job_info_from_search", run_tiles, len(tiles), "tiles/s"),
+            ("extract_job_info_from_posting", run_postings, len(postings), "postings/s"),
+            ("create_telegram_message", run_messages, len(jobs), "messages/s"),
+        ]
+        for name, func, items, unit in results:
+            elapsed, peak = measure(func, iterations)
+            rate = items * iterations / elapsed if elapsed else 0
+            print(f"{parser:<12} {name:<32} {rate:>10,.0f} {unit:<10} {peak / 1024:>8,.0f} KiB")
+
+
+def embedded_state_scripts(module, html_content):
+    # The script blocks the HTTP fast path reads, rebuilt as whole <script> elements
+    scripts = []
+    for _, pattern in module.EMBEDDED_STATE_PATTERNS:
+        match = pattern.search(html_content)
+        if match:
+            block = match.group(0)
+            scripts.append(block if block.startswith("<script") else f"<script>{block}")
+    return scripts
+
+
+def add_fixture(module, manifest, source, kind, name=None, keep_state=False):
+    # Saved pages are gzipped by the artifact writer
+    opener = gzip.open if source.endswith(".gz") else open
+    with opener(source, "rt", encoding="utf-8") as f:
+        html_content = f.read()
+
+    filename = name or os.path.basename(source)
+    if filename.endswith(".gz"):
+        filename = filename[:-3]
+    if not filename.endswith(".html"):
+        filename += ".html"
+    destination = os.path.join(FIXTURES, kind, filename)
+    cleaned = module.clean_html_for_saving(html_content)
+    if keep_state:
+        # Everything else is still dropped; the embedded data is what --check compares with the tiles
+        scripts = embedded_state_scripts(module, html_content)
+        if not scripts:
+            print("No embedded page data found, the page was probably saved with its scripts already removed")
+        cleaned = cleaned.replace("</body>", "".join(scripts) + "</body>", 1)
+    with open(destination, "w", encoding="utf-8") as f:
+        # Scripts carry session tokens and tracking ids, and the extractors never read them
+        f.write(cleaned)
+
+    manifest["fixtures"] = [f for f in manifest["fixtures"] if not (f["kind"] == kind and f["file"] == filename)]
+    manifest["fixtures"].append({
+        "kind": kind,
+        "file": filename,
+        "origin": "capture",
+        "captured": datetime.now().strftime("%Y-%m-%d"),
+        "source": os.path.basename(source),
+    })
+    manifest["version"] += 1
+    save_manifest(manifest)
+    print(f"Added {os.path.relpath(destination, ROOT)}, fixture set is now v{manifest['version']}")
+    print("Review the file for anything personal before committing it, then run --update to record its fields")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark and drift-check the Upwork extraction code")
+    parser.add_argument("--check", action="store_true", help="compare extracted fields with the recorded ones")
+    parser.add_argument("--update", action="store_true", help="re-record the expected fields from the current code")
+    parser.add_argument("--iterations", type=int, default=20, help="repetitions of each benchmark")
+    parser.add_argument("--add", metavar="HTML", help="add a SAVE_SEARCH_HTML / SAVE_POST_HTML dump as a fixture")
+    parser.add_argument("--kind", choices=["search", "posting"], help="fixture kind for --add")
+    parser.add_argument("--name", help="file name for --add, defaults to the dump's name")
+    parser.add_argument("--keep-state", action="store_true",
+                        help="for --add, keep the embedded page data so --check can verify the HTTP fast path")
+    args = parser.parse_args()
+
+    module = load_alerts_module()
+    manifest = load_manifest()
+
+    if args.add:
+        if not args.kind:
+            parser.error("--add needs --kind")
+        add_fixture(module, manifest, args.add, args.kind, args.name, args.keep_state)
+    elif args.update:
+        check(module, manifest, update=True)
+    elif args.check:
+        sys.exit(1 if check(module, manifest) else 0)
+    else:
+        benchmark(module, manifest, args.iterations)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,426 @@
+"""End-to-end replay of recorded pages through main(), with a virtual clock and a local Telegram stand-in.
+
+Runs the real polling loop of upwork-job-search-alerts.py without Upwork, Chrome or a bot. Search and posting
+pages come from recorded HTML, with fresh job uids written into the search tiles as new jobs "arrive" on a
+virtual clock. Every sleep moves that clock forward instead of waiting, and alerts go to a local HTTP server that
+answers like the Telegram Bot API, 429 rate limit responses included. Thousands of polling cycles run in seconds.
+
+    python benchmarks/replay_harness.py                                # 2000 cycles over the benchmark fixtures
+    python benchmarks/replay_harness.py --cycles 10000 --searches 5 --overlap 0.3 --rate-limit 0.05
+    python benchmarks/replay_harness.py --recordings debug             # SAVE_SEARCH_HTML / SAVE_POST_HTML captures
+
+Exits with status 1 when a job is alerted twice, never alerted, or alerted without ever being served.
+"""
+import argparse
+import glob
+import gzip
+import json
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from collections import Counter, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from itertools import islice
+from urllib.parse import parse_qs, urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from bench_extraction import SCRIPT, load_alerts_module, load_manifest, read_fixture  # noqa: E402
+
+FIRST_REPLAY_UID = 1900000000000000000
+UID_MARKER = "\0uid\0"
+# Alerts link to the job as .../jobs/<title>_~<ciphertext>/, and replayed tiles use the job uid as the ciphertext
+ALERT_UID_PATTERN = re.compile(r"_~(\d+)/")
+CIPHERTEXT_PATTERN = re.compile(r"_~[0-9A-Za-z]+")
+# Event waits are timeouts in the alerts script (idle sender, retry back-off), so they are cut to this many seconds
+MAX_REAL_WAIT = 0.005
+
+
+class ReplayFinished(Exception):
+    pass
+
+
+# ---------------------------
+# Virtual Clock
+# ---------------------------
+
+class VirtualClock:
+    # Stands in for the script's time module. time(), monotonic() and sleep() use the virtual clock, perf_counter()
+    # stays real so the durations the script logs are real ones
+    def __init__(self, start):
+        self.now = start
+        self.lock = threading.Lock()
+        self.on_main_sleep = None
+
+    def time(self):
+        with self.lock:
+            return self.now
+
+    def monotonic(self):
+        return self.time()
+
+    def sleep(self, seconds):
+        if self.on_main_sleep and threading.current_thread() is threading.main_thread():
+            self.on_main_sleep()
+        with self.lock:
+            self.now += max(0, seconds)
+
+    def __getattr__(self, name):
+        return getattr(time, name)
+
+
+class ReplayEvent(threading.Event):
+    def wait(self, timeout=None):
+        if timeout is None:
+            return super().wait()
+        return super().wait(min(timeout, MAX_REAL_WAIT))
+
+
+class ReplayThreading:
+    # Stands in for the script's threading module, only Event differs
+    Event = ReplayEvent
+
+    def __getattr__(self, name):
+        return getattr(threading, name)
+
+
+# ---------------------------
+# Recorded Pages
+# ---------------------------
+
+class SearchTemplate:
+    # A recorded search page split around its job tiles, so any list of job uids can be rendered into it
+    def __init__(self, name, html_content, tile_uid_pattern):
+        self.name = name
+        matches = list(tile_uid_pattern.finditer(html_content))
+        self.tiles = []
+        end = 0
+        for match in matches:
+            start = match.start()
+            end = html_content.index("</article>", start) + len("</article>")
+            tile = html_content[start:end].replace(match.group(1), UID_MARKER)
+            self.tiles.append(CIPHERTEXT_PATTERN.sub("_~" + UID_MARKER, tile).split(UID_MARKER))
+        self.head = html_content[:matches[0].start()] if matches else ""
+        self.tail = html_content[end:]
+
+    def render(self, job_uids):
+        tiles = [job_uid.join(self.tiles[index % len(self.tiles)]) for index, job_uid in enumerate(job_uids)]
+        return self.head + "".join(tiles) + self.tail
+
+
+def read_recording(path):
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        return f.read()
+
+
+def load_recordings(source):
+    # Either the benchmark fixtures or a ./debug folder of saved pages
+    if source is None:
+        fixtures = load_manifest()["fixtures"]
+        searches = [(f["file"], read_fixture(f)) for f in fixtures if f["kind"] == "search"]
+        postings = [(f["file"], read_fixture(f)) for f in fixtures if f["kind"] == "posting"]
+        return searches, postings
+
+    def pages(subdir):
+        paths = sorted(glob.glob(os.path.join(source, subdir, "*.html")) + glob.glob(os.path.join(source, subdir, "*.html.gz")))
+        return [(os.path.basename(path), read_recording(path)) for path in paths]
+
+    return pages("search_html"), pages("job_html")
+
+
+class ReplayFeed:
+    # The pluggable fetcher. New jobs arrive on the virtual clock at random, each on one search and, with
+    # probability overlap, on every other search too. A search page shows the newest jobs of its search
+    def __init__(self, templates, postings, search_urls, per_page, jobs_per_hour, overlap, fetch_errors, clock, max_pages, seed):
+        self.templates = templates
+        self.postings = postings
+        self.search_urls = search_urls
+        self.per_page = per_page
+        self.overlap = overlap
+        self.fetch_errors = fetch_errors
+        self.clock = clock
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.arrival_rate = jobs_per_hour * len(search_urls) / 3600
+        self.next_arrival = clock.time() + self.rng.expovariate(self.arrival_rate)
+        self.next_uid = FIRST_REPLAY_UID
+        self.feeds = {url: deque(maxlen=per_page * max_pages) for url in search_urls}
+        self.served = set()
+        self.fetches = Counter()
+
+    def _arrive(self):
+        now = self.clock.time()
+        while self.next_arrival <= now:
+            job_uid = str(self.next_uid)
+            self.next_uid += 1
+            home = self.rng.choice(self.search_urls)
+            for url in self.search_urls:
+                if url == home or self.rng.random() < self.overlap:
+                    self.feeds[url].appendleft(job_uid)
+            self.next_arrival += self.rng.expovariate(self.arrival_rate)
+
+    def fetch(self, url, page_kind):
+        with self.lock:
+            if self.rng.random() < self.fetch_errors:
+                self.fetches[f"{page_kind} failed"] += 1
+                return None
+            self.fetches[page_kind] += 1
+            if page_kind == "posting":
+                match = ALERT_UID_PATTERN.search(url + "/")
+                return self.postings[int(match.group(1)) % len(self.postings)] if match else self.postings[0]
+
+            self._arrive()
+            query = parse_qs(urlparse(url).query)
+            page = int(query.get("page", ["1"])[0])
+            search_url = next(search_url for search_url in self.search_urls
+                              if parse_qs(urlparse(search_url).query)["q"] == query["q"])
+            job_uids = list(islice(self.feeds[search_url], (page - 1) * self.per_page, page * self.per_page))
+            self.served.update(job_uids)
+            template = self.templates[self.fetches["search"] % len(self.templates)]
+        return template.render(job_uids)
+
+
+# ---------------------------
+# Telegram Stand-in
+# ---------------------------
+
+class TelegramStub:
+    # Answers sendMessage, editMessageText and deleteMessage like the Bot API, with a share of 429s
+    def __init__(self, rate_limit, retry_after, seed):
+        self.rate_limit = rate_limit
+        self.retry_after = retry_after
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = Counter()
+        self.alerts = Counter()
+        self.other_messages = 0
+        self.edits = 0
+        self.deleted = set()
+        self.message_uids = {}
+        self.next_message_id = 1
+
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                fields = {key: values[0] for key, values in parse_qs(self.rfile.read(length).decode()).items()}
+                status, body = stub.handle(self.path.rsplit("/", 1)[-1], fields)
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, name="telegram-stub", daemon=True).start()
+
+    def handle(self, method, fields):
+        with self.lock:
+            self.requests[method] += 1
+            if self.rng.random() < self.rate_limit:
+                self.requests["429"] += 1
+                return 429, {"ok": False, "error_code": 429,
+                             "description": f"Too Many Requests: retry after {self.retry_after}",
+                             "parameters": {"retry_after": self.retry_after}}
+
+            match = ALERT_UID_PATTERN.search(fields.get("text", ""))
+            if method == "sendMessage":
+                message_id = self.next_message_id
+                self.next_message_id += 1
+                if match:
+                    self.alerts[match.group(1)] += 1
+                    self.message_uids[message_id] = match.group(1)
+                else:
+                    self.other_messages += 1
+                return 200, {"ok": True, "result": {"message_id": message_id, "text": fields.get("text", "")}}
+            if method == "editMessageText":
+                self.edits += 1
+                return 200, {"ok": True, "result": {"message_id": int(fields.get("message_id", 0))}}
+            if method == "deleteMessage":
+                self.deleted.add(self.message_uids.get(int(fields.get("message_id", 0))))
+                return 200, {"ok": True, "result": True}
+            return 404, {"ok": False, "error_code": 404, "description": "Not Found"}
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+# ---------------------------
+# Replay
+# ---------------------------
+
+def current_rss_kib():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+    except (OSError, ValueError, AttributeError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def format_duration(seconds):
+    days, seconds = divmod(int(seconds), 86400)
+    hours, seconds = divmod(seconds, 3600)
+    return f"{days}d {hours}h {seconds // 60}m"
+
+
+def replay(args):
+    module = load_alerts_module()
+    if args.verbose:
+        del module.print
+
+    searches, postings = load_recordings(args.recordings)
+    templates = [SearchTemplate(name, html_content, module.TILE_UID_PATTERN) for name, html_content in searches]
+    skipped = [template.name for template in templates if not template.tiles]
+    templates = [template for template in templates if template.tiles]
+    if skipped:
+        print(f"Skipping search recordings without job uids in their tiles: {', '.join(skipped)}")
+    if not templates or not postings:
+        sys.exit("Need at least one search recording with job uids and one posting recording")
+
+    random.seed(args.seed)
+    clock = VirtualClock(time.time())
+    per_page = min(len(template.tiles) for template in templates)
+    search_urls = [f"https://www.upwork.com/nx/search/jobs/?q=replay-{index}&sort=recency" for index in range(args.searches)]
+    feed = ReplayFeed(templates, [html_content for _, html_content in postings], search_urls, per_page,
+                      args.jobs_per_hour, args.overlap, args.fetch_errors, clock, module.CATCH_UP_MAX_PAGES, args.seed)
+    stub = TelegramStub(args.rate_limit, args.retry_after, args.seed)
+
+    module.time = clock
+    module.threading = ReplayThreading()
+    module.page_fetcher = feed.fetch
+    module.SEARCH_URLS = search_urls
+    module.SEARCH_RESULTS_PER_PAGE = per_page
+    module.TELEGRAM_API_URL = stub.url
+    module.TELEGRAM_BOT_TOKEN = "replay"
+    module.TELEGRAM_CHAT_ID = "replay"
+    module.FILTER_RULES = {}
+    module.PROGRESSIVE_ALERTS = args.progressive
+    module.WORKER_MODE = False
+    module.METRICS_PORT = None
+    module.METRICS_LOG_FILE = None
+    module.SAVE_SEARCH_HTML = module.SAVE_POST_HTML = module.SAVE_TELEGRAM_MESSAGE = False
+    module.SELECTOR_DRIFT_ALERTS = False
+
+    stats = {"cycles": 0, "warm_rss": None, "warm_cycle": 0}
+    warm_up = max(1, args.cycles // 20)
+    run_check = module.run_check
+
+    def counted_run_check(*run_args, **run_kwargs):
+        result = run_check(*run_args, **run_kwargs)
+        stats["cycles"] += 1
+        if stats["cycles"] == warm_up:
+            # Caches and the job history have filled up by now, growth after this point is what matters
+            stats["warm_rss"], stats["warm_cycle"] = current_rss_kib(), stats["cycles"]
+            if args.tracemalloc:
+                tracemalloc.start()
+                stats["snapshot"] = tracemalloc.take_snapshot()
+        if args.progress and stats["cycles"] % args.progress == 0:
+            sys.stderr.write(f"{stats['cycles']} cycles, {sum(stub.alerts.values())} alerts delivered\n")
+        return result
+
+    def stop_when_done():
+        if stats["cycles"] < args.cycles:
+            return
+        # Let the outbox drain, so every queued alert counts before main() shuts the sender down
+        deadline = time.monotonic() + args.drain_timeout
+        while module.get_telegram_sender().queue_depth() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        raise ReplayFinished()
+
+    module.run_check = counted_run_check
+    clock.on_main_sleep = stop_when_done
+    virtual_start = clock.time()
+    start_rss = current_rss_kib()
+
+    # The job history, outbox, caches and archive are all created fresh in a scratch folder
+    original_dir = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="upwork-replay-") as workdir:
+        os.chdir(workdir)
+        sys.argv = [SCRIPT]
+        start = time.perf_counter()
+        try:
+            module.main()
+        except ReplayFinished:
+            pass
+        elapsed = time.perf_counter() - start
+        end_rss = current_rss_kib()
+        os.chdir(original_dir)
+    stub.close()
+
+    report(args, stats, feed, stub, elapsed, clock.time() - virtual_start, start_rss, end_rss, len(templates), len(postings))
+    alerted = set(stub.alerts)
+    duplicates = sum(1 for count in stub.alerts.values() if count > 1)
+    return 1 if duplicates or feed.served - alerted or alerted - feed.served else 0
+
+
+def report(args, stats, feed, stub, elapsed, virtual_elapsed, start_rss, end_rss, search_templates, posting_templates):
+    cycles = stats["cycles"]
+    delivered = sum(stub.alerts.values())
+    alerted = set(stub.alerts)
+    duplicates = {job_uid: count for job_uid, count in stub.alerts.items() if count > 1}
+    missed = feed.served - alerted
+    unexpected = alerted - feed.served
+
+    print(f"Replayed {cycles:,} cycles over {args.searches} searches ({search_templates} search and "
+          f"{posting_templates} posting recordings) in {elapsed:.1f}s, {format_duration(virtual_elapsed)} of virtual time")
+    print(f"  {'cycles/s':<14} {cycles / elapsed:>12,.1f}")
+    print(f"  {'alerts/s':<14} {delivered / elapsed:>12,.1f}")
+    print(f"  {'fetches':<14} {', '.join(f'{kind} {count:,}' for kind, count in sorted(feed.fetches.items()))}")
+    print(f"  {'telegram':<14} {', '.join(f'{method} {count:,}' for method, count in sorted(stub.requests.items()))}"
+          f", {stub.other_messages} without a job link")
+    status = "ok" if not (duplicates or missed or unexpected) else "FAILED"
+    print(f"  {'dedupe':<14} {len(feed.served):,} jobs served, {len(alerted):,} alerted, {len(duplicates)} alerted more than once, "
+          f"{len(missed)} never alerted, {len(unexpected)} never served: {status}")
+    for job_uid in sorted(missed)[:5]:
+        print(f"    never alerted: {job_uid}")
+    for job_uid, count in sorted(duplicates.items())[:5]:
+        print(f"    alerted {count} times: {job_uid}")
+
+    if stats["warm_rss"] is not None and cycles > stats["warm_cycle"]:
+        per_thousand = (end_rss - stats["warm_rss"]) / (cycles - stats["warm_cycle"]) * 1000
+        print(f"  {'memory':<14} RSS {start_rss / 1024:,.1f} MiB at start, {stats['warm_rss'] / 1024:,.1f} MiB after "
+              f"{stats['warm_cycle']:,} cycles, {end_rss / 1024:,.1f} MiB at the end ({per_thousand:+,.0f} KiB per 1000 cycles)")
+    if "snapshot" in stats:
+        growth = tracemalloc.take_snapshot().compare_to(stats["snapshot"], "lineno")
+        tracemalloc.stop()
+        print("  Largest Python allocation growth since warm-up:")
+        for stat in growth[:5]:
+            print(f"    {stat.size_diff / 1024:+,.0f} KiB  {stat.traceback[0].filename}:{stat.traceback[0].lineno}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded pages through the Upwork alerts main loop")
+    parser.add_argument("--cycles", type=int, default=2000, help="polling cycles (run_check calls) to replay")
+    parser.add_argument("--searches", type=int, default=3, help="search URLs to poll")
+    parser.add_argument("--jobs-per-hour", type=float, default=6, help="new jobs per search per virtual hour")
+    parser.add_argument("--overlap", type=float, default=0.2,
+                        help="chance a new job also shows up on each other search")
+    parser.add_argument("--rate-limit", type=float, default=0.02, help="share of Telegram requests answered with 429")
+    parser.add_argument("--retry-after", type=int, default=1, help="retry_after of the 429 responses")
+    parser.add_argument("--fetch-errors", type=float, default=0.0, help="share of page fetches that fail")
+    parser.add_argument("--progressive", action="store_true", help="replay with PROGRESSIVE_ALERTS on")
+    parser.add_argument("--recordings", metavar="DIR",
+                        help="folder with search_html/ and job_html/ captures, defaults to the benchmark fixtures")
+    parser.add_argument("--drain-timeout", type=float, default=60, help="real seconds to wait for the last alerts")
+    parser.add_argument("--seed", type=int, default=1, help="seed for job arrivals and 429s")
+    parser.add_argument("--progress", type=int, default=0, metavar="N", help="print progress every N cycles")
+    parser.add_argument("--tracemalloc", action="store_true", help="also trace Python allocations after warm-up (slower)")
+    parser.add_argument("--verbose", action="store_true", help="keep the alerts script's own output")
+    sys.exit(replay(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,33 +1,51 @@
 import time
+PROCESS_START = time.perf_counter()
 import os
 import random
+import sqlite3
 import pickle
 import re
 import json
+import html
+import queue
+import threading
+import functools
+import hashlib
+import fnmatch
+import gzip
+import socket
+import argparse
+import subprocess
 import requests
-from datetime import datetime, timedelta
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from datetime import datetime, timedelta, timezone
+from collections import Counter, OrderedDict, deque
+from urllib.parse import urljoin, urlparse, parse_qs, urlencode
 from dotenv import load_dotenv
 
-# Try to use lxml parser, fall back to html.parser if lxml is not available
+# BeautifulSoup, lxml and Selenium are slow to import, so they are loaded the first time they are needed.
+# A check answered by the HTTP fast path never loads Selenium at all
+
+BS4_PARSER = None  # Set on the first parse: lxml when it is installed, html.parser otherwise
+
+
 def get_bs4_parser():
-    try:
-        import lxml
-        return 'lxml'
-    except ImportError:
-        print("lxml parser not found, falling back to html.parser")
-        return 'html.parser'
+    global BS4_PARSER
+    if BS4_PARSER is None:
+        try:
+            import lxml
+            BS4_PARSER = 'lxml'
+        except ImportError:
+            print("lxml parser not found, falling back to html.parser")
+            BS4_PARSER = 'html.parser'
+    return BS4_PARSER
 
-BS4_PARSER = get_bs4_parser()
 
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
+def make_soup(html_content, parse_only=None):
+    from bs4 import BeautifulSoup
+    return BeautifulSoup(html_content, get_bs4_parser(), parse_only=parse_only)
 
 # ---------------------------
 # Configuration / Flags
@@ -38,9 +56,46 @@ load_dotenv()
 SAVE_SEARCH_HTML = False
 SAVE_POST_HTML = False
 SAVE_TELEGRAM_MESSAGE = False
-CHECK_INTERVAL = 3  # Time between checks in minutes
+ARTIFACT_MAX_TOTAL_MB = 500  # Oldest debug files are deleted once ./debug grows past this
+ARTIFACT_MAX_AGE_DAYS = 7  # Debug files older than this are deleted
+ARTIFACT_COMPRESSION_LEVEL = 6  # gzip level for debug files, 1 is fastest, 9 is smallest
+ARTIFACT_QUEUE_SIZE = 100  # Debug files waiting to be written; more are dropped rather than slow down a check
+DEBUG_TILES = False  # Print the structure of every parsed job tile
+SELECTOR_DRIFT_WINDOW = 200  # Recent lookups per selector group used to judge whether Upwork's markup changed
+SELECTOR_DRIFT_THRESHOLD = 0.8  # Warn when fewer lookups than this match on the first selector in the list
+SELECTOR_DRIFT_ALERTS = True  # Also send the markup change warning to Telegram
+CHECK_INTERVAL = 3  # Time between checks in minutes, and the starting interval for adaptive polling
+ADAPTIVE_POLLING = True  # Poll each search on its own interval based on how often it gets new jobs
+MIN_POLL_INTERVAL = 1  # Shortest interval in minutes for a busy search
+MAX_POLL_INTERVAL = 30  # Longest interval in minutes for a quiet search
+POLL_TARGET_NEW_JOBS = 1  # Adaptive polling aims for about this many new jobs per poll
+ARRIVAL_RATE_SMOOTHING = 0.3  # Weight of the latest poll in a search's new job rate
+FETCHES_PER_HOUR_BUDGET = 120  # Intervals are stretched so all searches together stay under this
+UNCHANGED_BACKOFF_AFTER = 3  # Polls in a row with the exact same job list before a search is slowed down further
+UNCHANGED_BACKOFF_FACTOR = 1.25  # Interval growth per further unchanged poll, up to MAX_POLL_INTERVAL
 MAX_DESCRIPTION_LENGTH = 300
-JOB_HISTORY_FILE = "job_history.pkl"
+JOB_HISTORY_FILE = "job_history.db"
+LEGACY_JOB_HISTORY_FILE = "job_history.pkl"  # Imported into JOB_HISTORY_FILE once, then renamed
+JOB_HISTORY_MAX_AGE_DAYS = 90  # Seen jobs older than this are forgotten
+JOB_ARCHIVE_FILE = "job_archive.db"  # Every new job with its numbers parsed out, kept for analysis; None to turn off
+JOB_ARCHIVE_BATCH_SIZE = 100  # Jobs written to the archive in one transaction
+JOB_ARCHIVE_FLUSH_INTERVAL = 5  # Longest wait in seconds before archived jobs are written
+ONCE_DELIVERY_TIMEOUT = 120  # With --once, longest wait in seconds for queued alerts to be sent before exiting
+CHROMEDRIVER_VERSION = None  # e.g. "120.0.6099.109" to pin chromedriver, None to match the installed Chrome
+CHROMEDRIVER_CACHE_FILE = "chromedriver.json"  # Remembers the chromedriver found on the first run; None to look it up every run
+WORKER_MODE = False  # Share SEARCH_URLS between several running copies of this script, same as --worker
+WORKER_ID = None  # Name of this worker, defaults to host name and process id; same as --worker-id
+COORDINATOR_FILE = "workers.db"  # SQLite file where workers register, must be on storage every worker can reach
+WORKER_HEARTBEAT_INTERVAL = 10  # Seconds between a worker's "still alive" updates
+WORKER_LEASE_TIMEOUT = 30  # A worker silent for this many seconds is treated as dead and its searches are taken over
+SHARED_STORAGE_NETWORK = False  # Set when workers on several machines share JOB_HISTORY_FILE and COORDINATOR_FILE over a network filesystem
+JOB_CLAIM_TIMEOUT = 600  # Seconds before a job claimed by a worker that never alerted it may be claimed by another
+TELEGRAM_OUTBOX_FILE = "telegram_outbox.db"  # Unsent alerts are kept here so they survive restarts
+TELEGRAM_MESSAGES_PER_SECOND = 1  # Telegram allows about one message per second to a single chat
+TELEGRAM_BURST = 3  # Messages that may go out back to back before the rate limit applies
+TELEGRAM_TIMEOUT = 10  # Seconds to wait for a Telegram API response
+TELEGRAM_MAX_RETRY_DELAY = 300  # Longest backoff in seconds between retries of a failed send
+TELEGRAM_API_URL = "https://api.telegram.org"  # Bot API server, e.g. a self-hosted one or the replay harness's stand-in
 
 TELEGRAM_BOT_TOKEN = os.environ.get("TELEGRAM_BOT_TOKEN")
 TELEGRAM_CHAT_ID = os.environ.get("TELEGRAM_CHAT_ID")
@@ -48,9 +103,69 @@ TELEGRAM_CHAT_ID = os.environ.get("TELEGRAM_CHAT_ID")
 search_urls_json = os.environ.get("SEARCH_URLS", "[]")
 SEARCH_URLS = json.loads(search_urls_json)
 
+filter_rules_json = os.environ.get("FILTER_RULES", "{}")
+FILTER_RULES = json.loads(filter_rules_json)
+
 USE_PROXY = True
 proxy_list_json = os.environ.get("PROXY_LIST", "[]")
 PROXY_LIST = json.loads(proxy_list_json)
+PROXY_FAILURE_THRESHOLD = 3  # Failed or blocked fetches in a row before a proxy is rested
+PROXY_COOLDOWN = 60  # Seconds a failing proxy is rested, doubled each time it fails again right after
+PROXY_MAX_COOLDOWN = 1800  # Longest rest in seconds for a failing proxy
+PROXY_LATENCY_WINDOW = 50  # Recent fetch times kept per proxy for its p50/p95 latency
+PROXY_EXTENSION_DIR = "proxy_auth_plugins"  # Chrome extensions that log in to authenticated SOCKS proxies
+
+METRICS_PORT = None  # e.g. 9108 to serve Prometheus metrics at http://127.0.0.1:9108/metrics
+METRICS_LOG_FILE = None  # e.g. "metrics.jsonl" to append every measurement as a JSON line
+
+BROWSER_POOL_SIZE = 2  # Number of warm Chrome instances kept alive between checks
+BROWSER_MAX_PAGES = 50  # Recycle a browser after it has loaded this many pages
+BROWSER_MAX_MEMORY_MB = 512  # Recycle a browser once its JS heap grows past this
+MAX_BROWSERS_PER_PROXY = 1  # Upper bound on browsers open through the same proxy at once
+
+BLOCK_RESOURCES = True  # Stop Chrome from downloading page resources we never read
+BLOCKED_RESOURCE_TYPES = ["image", "font", "media"]  # Any of "image", "font", "media", "stylesheet"
+BLOCKED_URL_PATTERNS = [
+    "*google-analytics.com*",
+    "*googletagmanager.com*",
+    "*doubleclick.net*",
+    "*connect.facebook.net*",
+    "*hotjar.com*",
+    "*segment.io*",
+    "*bat.bing.com*",
+    "*cdn.optimizely.com*",
+]
+RESOURCE_ALLOWLIST = []  # Full URLs that must always load; block patterns that would catch them are dropped
+
+PAGE_READY_TIMEOUT = 15  # Longest wait in seconds for a page's job content to be filled in
+PAGE_READY_POLL_INTERVAL = 0.25  # Seconds between checks of the page content
+PAGE_READY_STABLE_TIME = 1  # A page counts as ready once everything on it is filled in and unchanged for this long
+PAGE_READY_EMPTY_TIME = 4  # A loaded page with no job content and no "no results" notice counts as empty after this long unchanged
+SEARCH_RESULTS_PER_PAGE = 10  # Job tiles a search page shows when its URL has no per_page parameter
+HUMAN_PACING = False  # Pause and scroll like a person after each page is ready, costs HUMAN_PACING_DELAY per fetch
+HUMAN_PACING_DELAY = (2, 4)  # Range in seconds of the pause, picked at random for each page
+HUMAN_PACING_SCROLLS = 3  # Scrolls spread over the pause
+
+SEARCH_WORKERS = 2  # Search pages fetched in parallel
+DETAIL_WORKERS = 2  # Job postings fetched in parallel
+NOTIFY_WORKERS = 1  # Telegram messages sent in parallel
+PIPELINE_QUEUE_SIZE = 20  # Max jobs waiting between two pipeline stages
+MERGE_ALERTS_ACROSS_SEARCHES = True  # Send one alert per job listing every search that found it
+PROGRESSIVE_ALERTS = False  # Alert from the search result right away, then edit in the client and activity details
+
+DETAIL_CACHE_TTL = 30  # Minutes a fetched job posting is reused before it is fetched again
+DETAIL_CACHE_MAX_ENTRIES = 500  # Job postings kept in memory, least recently used are dropped first
+DETAIL_CACHE_FILE = "detail_cache.db"  # Also keep cached postings on disk; set to None for memory only
+DETAIL_CACHE_MAX_DISK_ENTRIES = 5000  # Job postings kept on disk
+
+INCREMENTAL_SCAN = True  # Only extract the tiles of jobs we haven't seen yet
+SEARCH_FINGERPRINTS = True  # Skip a search page outright when its job list is identical to the last poll's
+CATCH_UP_AFTER = 45  # Minutes without a successful poll of a search after which further result pages are checked too
+CATCH_UP_MAX_PAGES = 10  # Deepest result page a catch-up crawl goes to
+CATCH_UP_WORKERS = 2  # Result pages fetched at the same time during a catch-up crawl
+
+HTTP_FAST_PATH = False  # Try a plain HTTP request for Upwork's embedded page data before starting Chrome (experimental)
+HTTP_TIMEOUT = 15  # Seconds to wait for a fast path HTTP response
 
 USER_AGENTS = [
     "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
@@ -71,54 +186,878 @@ def setup_directories():
             os.makedirs(directory)
 
 
-def get_proxy():
+def get_proxy(candidates=None):
     if not USE_PROXY or not PROXY_LIST:
         return None
-    return random.choice(PROXY_LIST)
+    return get_proxy_manager().choose(candidates or PROXY_LIST)
 
 
 def get_user_agent():
     return random.choice(USER_AGENTS)
 
 
-def load_job_history():
-    if os.path.exists(JOB_HISTORY_FILE):
+def shared_journal_mode():
+    # WAL keeps its index in shared memory, which processes on different machines can't see, so a
+    # network filesystem needs the rollback journal and its file locks instead
+    return "DELETE" if SHARED_STORAGE_NETWORK else "WAL"
+
+
+class JobHistory:
+    def __init__(self, path):
+        # Workers in worker mode share this file, so wait for each other's writes instead of failing
+        self.db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.lock = threading.Lock()
+        with self.lock:
+            self.db.execute(f"PRAGMA journal_mode={shared_journal_mode()}")
+            if not SHARED_STORAGE_NETWORK:
+                self.db.execute("PRAGMA synchronous=NORMAL")
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "job_uid TEXT PRIMARY KEY, first_seen REAL NOT NULL, search_url TEXT) WITHOUT ROWID"
+            )
+            self.db.execute("CREATE INDEX IF NOT EXISTS jobs_first_seen ON jobs (first_seen)")
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS claims ("
+                "job_uid TEXT PRIMARY KEY, worker_id TEXT NOT NULL, claimed_at REAL NOT NULL) WITHOUT ROWID"
+            )
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS search_polls ("
+                "search_url TEXT PRIMARY KEY, polled_at REAL NOT NULL) WITHOUT ROWID"
+            )
+            self.db.commit()
+
+    def __contains__(self, job_uid):
+        with self.lock:
+            return self.db.execute("SELECT 1 FROM jobs WHERE job_uid = ?", (job_uid,)).fetchone() is not None
+
+    def __len__(self):
+        with self.lock:
+            return self.db.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+
+    def add(self, job_uid, search_url=None):
+        with self.lock:
+            self.db.execute(
+                "INSERT OR IGNORE INTO jobs (job_uid, first_seen, search_url) VALUES (?, ?, ?)",
+                (job_uid, time.time(), search_url)
+            )
+            self.db.commit()
+
+    def claim(self, job_uid, worker_id):
+        # Atomic across processes: True only for the one worker that gets to fetch and alert the job.
+        # A claim left by a worker that died before alerting can be taken over after JOB_CLAIM_TIMEOUT
+        now = time.time()
+        with self.lock:
+            claimed = self.db.execute(
+                "INSERT OR IGNORE INTO claims (job_uid, worker_id, claimed_at) "
+                "SELECT ?, ?, ? WHERE NOT EXISTS (SELECT 1 FROM jobs WHERE job_uid = ?)",
+                (job_uid, worker_id, now, job_uid)
+            ).rowcount
+            if not claimed:
+                claimed = self.db.execute(
+                    "UPDATE claims SET worker_id = ?, claimed_at = ? "
+                    "WHERE job_uid = ? AND (worker_id = ? OR claimed_at < ?) "
+                    "AND NOT EXISTS (SELECT 1 FROM jobs WHERE job_uid = ?)",
+                    (worker_id, now, job_uid, worker_id, now - JOB_CLAIM_TIMEOUT, job_uid)
+                ).rowcount
+            self.db.commit()
+        return bool(claimed)
+
+    def last_polled(self, search_url):
+        # Kept across restarts, so the first poll after downtime knows how long the search went unwatched
+        with self.lock:
+            row = self.db.execute("SELECT polled_at FROM search_polls WHERE search_url = ?", (search_url,)).fetchone()
+        return row[0] if row else None
+
+    def record_poll(self, search_url, polled_at):
+        with self.lock:
+            self.db.execute(
+                "INSERT INTO search_polls (search_url, polled_at) VALUES (?, ?) "
+                "ON CONFLICT (search_url) DO UPDATE SET polled_at = MAX(polled_at, excluded.polled_at)",
+                (search_url, polled_at)
+            )
+            self.db.commit()
+
+    def evict_older_than(self, max_age_days):
+        cutoff = time.time() - max_age_days * 86400
+        with self.lock:
+            removed = self.db.execute("DELETE FROM jobs WHERE first_seen < ?", (cutoff,)).rowcount
+            self.db.execute("DELETE FROM claims WHERE claimed_at < ?", (cutoff,))
+            self.db.commit()
+        if removed:
+            print(f"Forgot {removed} jobs first seen more than {max_age_days} days ago")
+        return removed
+
+    def migrate_from_pickle(self, path):
+        if not os.path.exists(path):
+            return
         try:
-            with open(JOB_HISTORY_FILE, 'rb') as f:
-                return pickle.load(f)
+            with open(path, 'rb') as f:
+                job_uids = pickle.load(f)
         except (pickle.PickleError, EOFError):
-            print(f"Error loading job history, starting fresh")
-    return set()
+            print(f"Error loading legacy job history from {path}, skipping migration")
+            return
 
+        now = time.time()
+        with self.lock:
+            self.db.executemany(
+                "INSERT OR IGNORE INTO jobs (job_uid, first_seen, search_url) VALUES (?, ?, NULL)",
+                [(job_uid, now) for job_uid in job_uids]
+            )
+            self.db.commit()
+        try:
+            os.replace(path, path + ".migrated")
+        except FileNotFoundError:
+            # Another worker finished the same migration first
+            return
+        print(f"Migrated {len(job_uids)} jobs from {path} to {JOB_HISTORY_FILE}")
 
-def save_job_history(job_history):
-    with open(JOB_HISTORY_FILE, 'wb') as f:
-        pickle.dump(job_history, f)
+    def close(self):
+        with self.lock:
+            self.db.close()
 
 
-def clean_html_for_saving(html_content):
-    soup = BeautifulSoup(html_content, BS4_PARSER)
-    
-    for script in soup.find_all('script'):
-        if script.get('src') and any(term in script['src'] for term in ['css', 'style']):
+def load_job_history():
+    job_history = JobHistory(JOB_HISTORY_FILE)
+    job_history.migrate_from_pickle(LEGACY_JOB_HISTORY_FILE)
+    job_history.evict_older_than(JOB_HISTORY_MAX_AGE_DAYS)
+    return job_history
+
+
+# ---------------------------
+# Debug Artifacts
+# ---------------------------
+
+SCRIPT_BLOCK_PATTERN = re.compile(r'<script\b([^>]*)>.*?</script\s*>', re.S | re.I)
+SCRIPT_SRC_PATTERN = re.compile(r'\bsrc\s*=\s*["\']?([^"\'\s>]+)', re.I)
+
+
+def iter_html_without_scripts(html_content):
+    # One pass over the raw text, yielding the pieces between scripts instead of building a parse tree
+    position = 0
+    for match in SCRIPT_BLOCK_PATTERN.finditer(html_content):
+        src = SCRIPT_SRC_PATTERN.search(match.group(1))
+        if src and any(term in src.group(1) for term in ['css', 'style']):
             continue
-        script.decompose()
-    
-    return str(soup)
+        yield html_content[position:match.start()]
+        position = match.end()
+    yield html_content[position:]
+
+
+def clean_html_for_saving(html_content):
+    return "".join(iter_html_without_scripts(html_content))
+
+
+class ArtifactWriter:
+    def __init__(self, root):
+        self.root = root
+        self.queue = queue.Queue(maxsize=ARTIFACT_QUEUE_SIZE)
+        self.files = deque()  # (mtime, size, path), oldest first
+        self.total_bytes = 0
+        self.dropped = 0
+        self.thread = threading.Thread(target=self._run, name="artifact-writer", daemon=True)
+        self._scan()
+        self.thread.start()
+
+    def _scan(self):
+        found = []
+        for directory, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                path = os.path.join(directory, filename)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                found.append((stat.st_mtime, stat.st_size, path))
+        found.sort()
+        self.files.extend(found)
+        self.total_bytes = sum(size for _, size, _ in found)
+
+    def save(self, subdir, filename, content, strip_scripts=False):
+        # Never blocks the check: when the writer falls behind, the artifact is dropped
+        try:
+            self.queue.put_nowait((subdir, filename, content, strip_scripts))
+        except queue.Full:
+            self.dropped += 1
+            metrics.inc("upwork_alerts_artifacts_dropped_total")
+
+    def _write(self, subdir, filename, content, strip_scripts):
+        directory = os.path.join(self.root, subdir)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, filename + ".gz")
+        pieces = iter_html_without_scripts(content) if strip_scripts else [content]
+        with open(path + ".tmp", "wb") as raw, \
+                gzip.GzipFile(filename=filename, mode="wb", fileobj=raw, compresslevel=ARTIFACT_COMPRESSION_LEVEL) as f:
+            for piece in pieces:
+                f.write(piece.encode("utf-8"))
+        os.replace(path + ".tmp", path)
+        size = os.path.getsize(path)
+        self.files.append((time.time(), size, path))
+        self.total_bytes += size
+        metrics.inc("upwork_alerts_artifacts_written_total", kind=subdir)
+        print(f"Saved {path} ({len(content) / 1024:.0f} KB, {size / 1024:.0f} KB compressed)")
+
+    def _rotate(self):
+        cutoff = time.time() - ARTIFACT_MAX_AGE_DAYS * 86400
+        max_bytes = ARTIFACT_MAX_TOTAL_MB * 1024 * 1024
+        removed = 0
+        while self.files and (self.files[0][0] < cutoff or self.total_bytes > max_bytes):
+            _, size, path = self.files.popleft()
+            self.total_bytes -= size
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError:
+                pass
+        if removed:
+            print(f"Removed {removed} old debug files, {self.total_bytes / (1024 * 1024):.0f} MB left in {self.root}")
+        metrics.set("upwork_alerts_artifact_bytes", self.total_bytes)
+
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            # Write everything that piled up, then rotate once for the whole batch
+            while True:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            for item in batch:
+                if item is _STOP:
+                    continue
+                try:
+                    self._write(*item)
+                except Exception as e:
+                    print(f"Error saving debug file {item[1]}: {e}")
+            try:
+                self._rotate()
+            except Exception as e:
+                print(f"Error removing old debug files: {e}")
+            for _ in batch:
+                self.queue.task_done()
+            if any(item is _STOP for item in batch):
+                return
+
+    def close(self, timeout=30):
+        self.queue.put(_STOP)
+        self.thread.join(timeout)
+        if self.dropped:
+            print(f"Dropped {self.dropped} debug files because the writer fell behind")
 
 
-def save_html(html_content, prefix, identifier):
+artifact_writer = None
+_artifact_writer_lock = threading.Lock()
+
+
+def get_artifact_writer():
+    global artifact_writer
+    with _artifact_writer_lock:
+        if artifact_writer is None:
+            artifact_writer = ArtifactWriter("debug")
+        return artifact_writer
+
+
+def close_artifact_writer():
+    global artifact_writer
+    with _artifact_writer_lock:
+        if artifact_writer is not None:
+            artifact_writer.close()
+            artifact_writer = None
+
+
+def save_html(html_content, prefix, identifier, strip_scripts=True):
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"./debug/{prefix}/{timestamp}_{identifier}.html"
-    
-    with open(filename, 'w', encoding='utf-8') as f:
-        f.write(clean_html_for_saving(html_content))
-    
-    print(f"Saved HTML to {filename}")
+    get_artifact_writer().save(prefix, f"{timestamp}_{identifier}.html", html_content, strip_scripts)
+
+
+# ---------------------------
+# Proxy Manager
+# ---------------------------
+
+class ProxyStats:
+    def __init__(self, proxy):
+        self.proxy = proxy
+        self.successes = 0
+        self.failures = 0
+        self.blocks = 0
+        self.latencies = deque(maxlen=PROXY_LATENCY_WINDOW)
+        self.consecutive_failures = 0
+        self.trips = 0
+        self.open_until = 0
+
+    def success_rate(self):
+        # Smoothed so a proxy with a handful of fetches isn't judged on them alone
+        return (self.successes + 1) / (self.successes + self.failures + self.blocks + 2)
+
+    def latency_percentile(self, fraction):
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+    def expected_cost(self):
+        # Seconds spent per successful fetch; proxies without a measured latency are tried first
+        p50 = self.latency_percentile(0.5)
+        return (p50 or 0) / self.success_rate()
+
+
+class ProxyManager:
+    def __init__(self, proxies):
+        self.lock = threading.Lock()
+        self.stats = {proxy: ProxyStats(proxy) for proxy in proxies}
+
+    def _get_stats(self, proxy):
+        stats = self.stats.get(proxy)
+        if stats is None:
+            stats = self.stats[proxy] = ProxyStats(proxy)
+        return stats
+
+    def choose(self, candidates):
+        with self.lock:
+            now = time.time()
+            pool = [self._get_stats(proxy) for proxy in candidates]
+            closed = [stats for stats in pool if stats.open_until <= now]
+            if not closed:
+                # Every proxy is resting, use the one that comes back soonest rather than none at all
+                return min(pool, key=lambda stats: stats.open_until).proxy
+            # Compare two at random and keep the cheaper one, so fast proxies get most fetches
+            # without every worker piling onto the same one
+            pair = random.sample(closed, min(2, len(closed)))
+            return min(pair, key=lambda stats: stats.expected_cost()).proxy
+
+    def record(self, proxy, outcome, seconds=None):
+        # Returns True when this result takes the proxy out of rotation
+        if not proxy:
+            return False
+        with self.lock:
+            stats = self._get_stats(proxy)
+            if outcome == "success":
+                stats.successes += 1
+                stats.consecutive_failures = 0
+                stats.trips = 0
+                if seconds is not None:
+                    stats.latencies.append(seconds)
+                tripped = False
+            else:
+                if outcome == "blocked":
+                    stats.blocks += 1
+                else:
+                    stats.failures += 1
+                stats.consecutive_failures += 1
+                # A proxy that just came back from a rest is rested again on its first failure
+                tripped = stats.consecutive_failures >= (1 if stats.trips else PROXY_FAILURE_THRESHOLD)
+                if tripped:
+                    cooldown = min(PROXY_COOLDOWN * 2 ** stats.trips, PROXY_MAX_COOLDOWN)
+                    stats.trips += 1
+                    stats.consecutive_failures = 0
+                    stats.open_until = time.time() + cooldown
+                    print(f"Resting proxy {redact_proxy(proxy)} for {cooldown}s after repeated failures ({outcome})")
+            self._publish(stats)
+        return tripped
+
+    def is_open(self, proxy):
+        with self.lock:
+            stats = self.stats.get(proxy)
+            return stats is not None and stats.open_until > time.time()
+
+    def _publish(self, stats):
+        proxy = redact_proxy(stats.proxy)
+        metrics.set("upwork_alerts_proxy_success_ratio", stats.success_rate(), proxy=proxy)
+        metrics.set("upwork_alerts_proxy_resting", 1 if stats.open_until > time.time() else 0, proxy=proxy)
+        for name, fraction in (("p50", 0.5), ("p95", 0.95)):
+            latency = stats.latency_percentile(fraction)
+            if latency is not None:
+                metrics.set(f"upwork_alerts_proxy_latency_{name}_seconds", latency, proxy=proxy)
+
+    def summary(self):
+        with self.lock:
+            now = time.time()
+            lines = []
+            for stats in self.stats.values():
+                total = stats.successes + stats.failures + stats.blocks
+                if not total:
+                    continue
+                p50 = stats.latency_percentile(0.5)
+                p95 = stats.latency_percentile(0.95)
+                latency = f"p50 {p50:.1f}s, p95 {p95:.1f}s" if p50 is not None else "no successful fetches"
+                resting = f", resting {int(stats.open_until - now)}s" if stats.open_until > now else ""
+                lines.append(f"  {redact_proxy(stats.proxy)}: {stats.successes}/{total} ok, "
+                             f"{stats.blocks} blocked, {latency}{resting}")
+        if not lines:
+            return "Proxies - no fetches yet"
+        return "Proxies:\n" + "\n".join(lines)
+
+
+proxy_manager = None
+_proxy_manager_lock = threading.Lock()
+
+
+def get_proxy_manager():
+    global proxy_manager
+    with _proxy_manager_lock:
+        if proxy_manager is None:
+            proxy_manager = ProxyManager(PROXY_LIST)
+        return proxy_manager
+
+
+PROXY_EXTENSION_MANIFEST = """
+{
+    "version": "1.0.0",
+    "manifest_version": 2,
+    "name": "Chrome Proxy",
+    "permissions": [
+        "proxy",
+        "tabs",
+        "unlimitedStorage",
+        "storage",
+        "<all_urls>",
+        "webRequest",
+        "webRequestBlocking"
+    ],
+    "background": {
+        "scripts": ["background.js"]
+    }
+}
+"""
+
+PROXY_EXTENSION_BACKGROUND_JS = """
+var config = {
+    mode: "fixed_servers",
+    rules: {
+        singleProxy: {
+            scheme: "socks5",
+            host: %(host)s,
+            port: %(port)d
+        },
+        bypassList: ["localhost"]
+    }
+};
+chrome.proxy.settings.set({value: config, scope: "regular"}, function() {});
+function callbackFn(details) {
+    return {
+        authCredentials: {
+            username: %(username)s,
+            password: %(password)s
+        }
+    };
+}
+chrome.webRequest.onAuthRequired.addListener(
+    callbackFn,
+    {urls: ["<all_urls>"]},
+    ['blocking']
+);
+"""
+
+
+_proxy_extensions = {}
+_proxy_extensions_lock = threading.Lock()
+
+
+def get_proxy_auth_extension(proxy, host, port, username, password):
+    # Each proxy gets its own extension directory, written once and reused by every browser started with it
+    with _proxy_extensions_lock:
+        plugin_dir = _proxy_extensions.get(proxy)
+        if plugin_dir is not None:
+            return plugin_dir
+
+        plugin_dir = os.path.abspath(os.path.join(
+            PROXY_EXTENSION_DIR, hashlib.sha1(proxy.encode("utf-8")).hexdigest()[:12]))
+        background_js = PROXY_EXTENSION_BACKGROUND_JS % {
+            "host": json.dumps(host),
+            "port": int(port),
+            "username": json.dumps(username),
+            "password": json.dumps(password),
+        }
+        background_path = os.path.join(plugin_dir, "background.js")
+        existing = None
+        if os.path.exists(background_path):
+            with open(background_path) as f:
+                existing = f.read()
+        if existing != background_js:
+            os.makedirs(plugin_dir, exist_ok=True)
+            with open(os.path.join(plugin_dir, "manifest.json"), "w") as f:
+                f.write(PROXY_EXTENSION_MANIFEST)
+            with open(background_path, "w") as f:
+                f.write(background_js)
+        _proxy_extensions[proxy] = plugin_dir
+        return plugin_dir
+
+
+# ---------------------------
+# Metrics
+# ---------------------------
+
+HISTOGRAM_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300)
+
+
+def redact_proxy(proxy):
+    # Proxy URLs can carry credentials, which must never end up in metrics or logs
+    if not proxy:
+        return "direct"
+    parsed = urlparse(proxy)
+    return f"{parsed.scheme}://{parsed.hostname}:{parsed.port}" if parsed.hostname else "proxy"
+
+
+class Metrics:
+    def __init__(self):
+        self.enabled = False
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+        self.log_file = None
+
+    def enable(self, log_path=None):
+        self.enabled = True
+        if log_path:
+            self.log_file = open(log_path, "a", encoding="utf-8", buffering=1)
+
+    def _log(self, kind, name, value, labels):
+        if self.log_file:
+            self.log_file.write(json.dumps({"ts": round(time.time(), 3), "type": kind, "name": name,
+                                            "value": value, "labels": labels}) + "\n")
+
+    def inc(self, name, value=1, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+            self._log("counter", name, value, labels)
+
+    def set(self, name, value, **labels):
+        if not self.enabled:
+            return
+        with self.lock:
+            self.gauges[(name, tuple(sorted(labels.items())))] = value
+
+    def observe(self, name, value, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = [[0] * len(HISTOGRAM_BUCKETS), 0.0, 0]
+            for index, bound in enumerate(HISTOGRAM_BUCKETS):
+                if value <= bound:
+                    histogram[0][index] += 1
+            histogram[1] += value
+            histogram[2] += 1
+            self._log("histogram", name, round(value, 4), labels)
+
+    def render(self):
+        def label_text(labels, extra=()):
+            pairs = list(labels) + list(extra)
+            if not pairs:
+                return ""
+            escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+            return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+        lines = []
+        with self.lock:
+            for kind, series in (("counter", self.counters), ("gauge", self.gauges)):
+                for name in sorted({name for name, _ in series}):
+                    lines.append(f"# TYPE {name} {kind}")
+                    for (series_name, labels), value in series.items():
+                        if series_name == name:
+                            lines.append(f"{name}{label_text(labels)} {value}")
+            for name in sorted({name for name, _ in self.histograms}):
+                lines.append(f"# TYPE {name} histogram")
+                for (series_name, labels), (buckets, total, count) in self.histograms.items():
+                    if series_name != name:
+                        continue
+                    for bound, bucket_count in zip(HISTOGRAM_BUCKETS, buckets):
+                        lines.append(f"{name}_bucket{label_text(labels, [('le', bound)])} {bucket_count}")
+                    lines.append(f"{name}_bucket{label_text(labels, [('le', '+Inf')])} {count}")
+                    lines.append(f"{name}_sum{label_text(labels)} {total}")
+                    lines.append(f"{name}_count{label_text(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+
+
+def timed(name, labels=None):
+    # Decorator recording how long each call takes; labels builds the metric labels from the call arguments
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not metrics.enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                metrics.observe(name, time.perf_counter() - start, **(labels(*args, **kwargs) if labels else {}))
+        return wrapper
+    return decorator
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = metrics.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics():
+    if not METRICS_PORT and not METRICS_LOG_FILE:
+        return
+    metrics.enable(METRICS_LOG_FILE)
+    if METRICS_PORT:
+        server = ThreadingHTTPServer(("127.0.0.1", METRICS_PORT), MetricsHandler)
+        threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+        print(f"Serving metrics at http://127.0.0.1:{METRICS_PORT}/metrics")
+    if METRICS_LOG_FILE:
+        print(f"Writing metrics to {METRICS_LOG_FILE}")
+
+
+# ---------------------------
+# Telegram Delivery
+# ---------------------------
+
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class TelegramSender:
+    def __init__(self, outbox_file):
+        self.db = sqlite3.connect(outbox_file, check_same_thread=False)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS outbox ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, method TEXT NOT NULL, payload TEXT NOT NULL, "
+            "created_at REAL NOT NULL, attempts INTEGER NOT NULL DEFAULT 0, discovered_at REAL)"
+        )
+        columns = [row[1] for row in self.db.execute("PRAGMA table_info(outbox)")]
+        if "discovered_at" not in columns:
+            self.db.execute("ALTER TABLE outbox ADD COLUMN discovered_at REAL")
+        if "job_uid" not in columns:
+            self.db.execute("ALTER TABLE outbox ADD COLUMN job_uid TEXT")
+        # Message ids of sent alerts, so progressive alerts can be edited once the job posting is fetched
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS messages ("
+            "job_uid TEXT PRIMARY KEY, message_id INTEGER NOT NULL, sent_at REAL NOT NULL) WITHOUT ROWID"
+        )
+        # Telegram only allows editing and deleting messages for 48 hours
+        self.db.execute("DELETE FROM messages WHERE sent_at < ?", (time.time() - 48 * 3600,))
+        self.db.commit()
+        self.db_lock = threading.Lock()
+
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=2)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self.bucket = TokenBucket(TELEGRAM_MESSAGES_PER_SECOND, TELEGRAM_BURST)
+        self.wakeup = threading.Event()
+        self.stopping = threading.Event()
+        self.sent = 0
+        self.retries = 0
+        self.dropped = 0
+        self.last_latency = None
+        self.total_latency = 0.0
+        self.thread = threading.Thread(target=self._run, name="telegram-sender", daemon=True)
+        self.thread.start()
+
+        pending = self.queue_depth()
+        if pending:
+            print(f"Resuming {pending} unsent Telegram messages from {outbox_file}")
+
+    def enqueue(self, method, payload, discovered_at=None, job_uid=None):
+        # With a job_uid, a sendMessage remembers the message it creates, and editMessageText and deleteMessage
+        # act on that message. Rows go out strictly in order, so an edit always follows its send
+        with self.db_lock:
+            self.db.execute(
+                "INSERT INTO outbox (method, payload, created_at, discovered_at, job_uid) VALUES (?, ?, ?, ?, ?)",
+                (method, json.dumps(payload), time.time(), discovered_at, job_uid)
+            )
+            self.db.commit()
+        self.wakeup.set()
+
+    def queue_depth(self):
+        with self.db_lock:
+            depth = self.db.execute("SELECT COUNT(*) FROM outbox").fetchone()[0]
+        metrics.set("upwork_alerts_telegram_outbox_depth", depth)
+        return depth
+
+    def status(self):
+        average = self.total_latency / self.sent if self.sent else 0
+        last = f"{self.last_latency:.1f}s" if self.last_latency is not None else "n/a"
+        return (f"Telegram outbox: {self.queue_depth()} queued, {self.sent} sent, {self.retries} retries, "
+                f"{self.dropped} dropped, last latency {last}, average {average:.1f}s")
+
+    def _next(self):
+        with self.db_lock:
+            return self.db.execute(
+                "SELECT id, method, payload, created_at, attempts, discovered_at, job_uid FROM outbox ORDER BY id LIMIT 1"
+            ).fetchone()
+
+    def _message_id(self, job_uid):
+        with self.db_lock:
+            row = self.db.execute("SELECT message_id FROM messages WHERE job_uid = ?", (job_uid,)).fetchone()
+        return row[0] if row else None
+
+    def _remember_message(self, job_uid, response):
+        try:
+            message_id = response.json()["result"]["message_id"]
+        except (ValueError, KeyError, TypeError):
+            return
+        with self.db_lock:
+            self.db.execute(
+                "INSERT OR REPLACE INTO messages (job_uid, message_id, sent_at) VALUES (?, ?, ?)",
+                (job_uid, message_id, time.time())
+            )
+            self.db.commit()
+
+    def _resend_as_new(self, row_id):
+        # An edit that can't be applied becomes a new message, so the details are never lost
+        with self.db_lock:
+            self.db.execute("UPDATE outbox SET method = 'sendMessage' WHERE id = ?", (row_id,))
+            self.db.commit()
+
+    def _finish(self, row_id):
+        with self.db_lock:
+            self.db.execute("DELETE FROM outbox WHERE id = ?", (row_id,))
+            self.db.commit()
+
+    def _retry_later(self, row_id, delay):
+        self.retries += 1
+        with self.db_lock:
+            self.db.execute("UPDATE outbox SET attempts = attempts + 1 WHERE id = ?", (row_id,))
+            self.db.commit()
+        self.stopping.wait(delay)
+
+    def _run(self):
+        while not self.stopping.is_set():
+            row = self._next()
+            if row is None:
+                self.wakeup.wait(5)
+                self.wakeup.clear()
+                continue
+
+            row_id, method, payload, created_at, attempts, discovered_at, job_uid = row
+            data = json.loads(payload)
+            if method in ("editMessageText", "deleteMessage"):
+                message_id = self._message_id(job_uid)
+                if message_id is None and method == "deleteMessage":
+                    self._finish(row_id)
+                    continue
+                if message_id is None:
+                    print("Original alert was never delivered, sending the update as a new message")
+                    self._resend_as_new(row_id)
+                    continue
+                data["message_id"] = message_id
+
+            self.bucket.acquire()
+            url = f"{TELEGRAM_API_URL}/bot{TELEGRAM_BOT_TOKEN}/{method}"
+            backoff = min(TELEGRAM_MAX_RETRY_DELAY, 2 ** attempts)
+
+            request_start = time.perf_counter()
+            try:
+                response = self.session.post(url, data=data, timeout=TELEGRAM_TIMEOUT)
+            except requests.RequestException as e:
+                print(f"Error sending Telegram message, retrying in {backoff}s: {e}")
+                metrics.inc("upwork_alerts_telegram_sends_total", outcome="error")
+                self._retry_later(row_id, backoff)
+                continue
+            metrics.observe("upwork_alerts_telegram_request_seconds", time.perf_counter() - request_start)
+            metrics.inc("upwork_alerts_telegram_sends_total", outcome=str(response.status_code))
+
+            if response.status_code == 200:
+                if method == "sendMessage" and job_uid:
+                    self._remember_message(job_uid, response)
+                self._finish(row_id)
+                self.sent += 1
+                self.last_latency = time.time() - created_at
+                self.total_latency += self.last_latency
+                metrics.observe("upwork_alerts_telegram_queue_seconds", self.last_latency)
+                if discovered_at:
+                    metrics.observe("upwork_alerts_alert_latency_seconds", time.time() - discovered_at)
+                print(f"Telegram message sent successfully ({self.last_latency:.1f}s after queueing)")
+            elif response.status_code == 429:
+                try:
+                    retry_after = response.json().get("parameters", {}).get("retry_after", backoff)
+                except ValueError:
+                    retry_after = backoff
+                print(f"Telegram rate limit hit, retrying in {retry_after}s")
+                self._retry_later(row_id, retry_after)
+            elif response.status_code >= 500:
+                print(f"Telegram server error {response.status_code}, retrying in {backoff}s")
+                self._retry_later(row_id, backoff)
+            elif method == "editMessageText" and "message is not modified" not in response.text:
+                # Usually the alert was deleted in the chat or is too old to edit
+                print(f"Could not edit Telegram message, sending it as a new one: {response.text}")
+                self._resend_as_new(row_id)
+            elif method != "sendMessage":
+                self._finish(row_id)
+            else:
+                # Anything else is a request Telegram will never accept, so retrying would block the queue
+                print(f"Failed to send Telegram message, dropping it: {response.text}")
+                self._finish(row_id)
+                self.dropped += 1
+
+    def flush(self, timeout):
+        deadline = time.time() + timeout
+        while self.queue_depth() and time.time() < deadline:
+            time.sleep(0.2)
+
+    def close(self):
+        self.stopping.set()
+        self.wakeup.set()
+        self.thread.join(timeout=TELEGRAM_TIMEOUT + 1)
+        self.session.close()
+        with self.db_lock:
+            self.db.close()
+
 
+telegram_sender = None
+_telegram_sender_lock = threading.Lock()
 
-def send_telegram_message(message):
-    url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
+
+def get_telegram_sender():
+    global telegram_sender
+    with _telegram_sender_lock:
+        if telegram_sender is None:
+            telegram_sender = TelegramSender(TELEGRAM_OUTBOX_FILE)
+        return telegram_sender
+
+
+def close_telegram_sender():
+    global telegram_sender
+    with _telegram_sender_lock:
+        if telegram_sender is not None:
+            telegram_sender.close()
+            telegram_sender = None
+
+
+@timed("upwork_alerts_send_telegram_message_seconds")
+def send_telegram_message(message, discovered_at=None, job_uid=None):
     data = {
         "chat_id": TELEGRAM_CHAT_ID,
         "text": message,
@@ -127,28 +1066,89 @@ def send_telegram_message(message):
     }
     
     try:
-        response = requests.post(url, data=data)
-        if response.status_code != 200:
-            print(f"Failed to send Telegram message: {response.text}")
-        else:
-            print("Telegram message sent successfully")
+        get_telegram_sender().enqueue("sendMessage", data, discovered_at, job_uid)
             
         if SAVE_TELEGRAM_MESSAGE:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"./debug/telegram_messages/{timestamp}.txt"
-            with open(filename, 'w', encoding='utf-8') as f:
-                f.write(message)
-            print(f"Saved Telegram message to {filename}")
+            get_artifact_writer().save("telegram_messages", f"{timestamp}.txt", message)
             
     except Exception as e:
-        print(f"Error sending Telegram message: {e}")
+        print(f"Error queueing Telegram message: {e}")
 
 
-def get_html(url, wait_selector=None):
-    print(f"Fetching HTML for {url}")
+def update_telegram_message(job_uid, message):
+    data = {
+        "chat_id": TELEGRAM_CHAT_ID,
+        "text": message,
+        "parse_mode": "HTML",
+        "disable_web_page_preview": True
+    }
+    try:
+        get_telegram_sender().enqueue("editMessageText", data, job_uid=job_uid)
+    except Exception as e:
+        print(f"Error queueing Telegram message update: {e}")
+
+
+def delete_telegram_message(job_uid):
+    try:
+        get_telegram_sender().enqueue("deleteMessage", {"chat_id": TELEGRAM_CHAT_ID}, job_uid=job_uid)
+    except Exception as e:
+        print(f"Error queueing Telegram message removal: {e}")
+
+
+_chromedriver_path = None
+_chromedriver_from_cache = False
+_chromedriver_lock = threading.Lock()
+
+
+def chromedriver_version(path):
+    try:
+        output = subprocess.run([path, "--version"], capture_output=True, text=True, timeout=10).stdout
+    except (OSError, subprocess.SubprocessError):
+        return None
+    match = re.search(r'ChromeDriver ([\d.]+)', output)
+    return match.group(1) if match else None
+
+
+def load_cached_chromedriver():
+    # Reuse the driver found by an earlier run, so starting up needs no network request for driver metadata
+    try:
+        with open(CHROMEDRIVER_CACHE_FILE, encoding="utf-8") as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+    path = cached.get("path")
+    if not path or not os.access(path, os.X_OK):
+        return None
+    if CHROMEDRIVER_VERSION and not str(cached.get("version") or "").startswith(CHROMEDRIVER_VERSION):
+        return None
+    return path
+
 
+def get_chromedriver_path(refresh=False):
+    global _chromedriver_path, _chromedriver_from_cache
+    with _chromedriver_lock:
+        if refresh:
+            _chromedriver_path = None
+        if _chromedriver_path is None and not refresh and CHROMEDRIVER_CACHE_FILE:
+            _chromedriver_path = load_cached_chromedriver()
+            _chromedriver_from_cache = _chromedriver_path is not None
+        if _chromedriver_path is None:
+            _chromedriver_from_cache = False
+            from webdriver_manager.chrome import ChromeDriverManager
+            print("Resolving chromedriver" + (f" {CHROMEDRIVER_VERSION}" if CHROMEDRIVER_VERSION else ""))
+            _chromedriver_path = ChromeDriverManager(driver_version=CHROMEDRIVER_VERSION).install()
+            if CHROMEDRIVER_CACHE_FILE:
+                with open(CHROMEDRIVER_CACHE_FILE, "w", encoding="utf-8") as f:
+                    json.dump({"path": _chromedriver_path, "version": chromedriver_version(_chromedriver_path),
+                               "resolved_at": datetime.now().isoformat(timespec="seconds")}, f, indent=2)
+        return _chromedriver_path
+
+
+def build_chrome_options(proxy, user_agent):
+    from selenium.webdriver.chrome.options import Options
     options = Options()
-    options.add_argument(f"user-agent={get_user_agent()}")
+    options.add_argument(f"user-agent={user_agent}")
     options.add_argument("--disable-blink-features=AutomationControlled")
     options.add_argument("--disable-extensions")
     options.add_experimental_option("excludeSwitches", ["enable-automation"])
@@ -158,71 +1158,16 @@ def get_html(url, wait_selector=None):
     options.add_argument("--window-size=1920,1080")
     options.add_argument("--headless")
 
-    proxy = get_proxy()
     if proxy and proxy.startswith("socks"):
         try:
             proxy_parts = proxy.replace("socks5://", "").split("@")
             if len(proxy_parts) > 1:
                 credentials, host_port = proxy_parts
-                username, password = credentials.split(":")
+                username, password = credentials.split(":", 1)
                 host, port = host_port.split(":")
                 
-                # Create extension for authenticated SOCKS
-                manifest_json = """
-                {
-                    "version": "1.0.0",
-                    "manifest_version": 2,
-                    "name": "Chrome Proxy",
-                    "permissions": [
-                        "proxy",
-                        "tabs",
-                        "unlimitedStorage",
-                        "storage",
-                        "<all_urls>",
-                        "webRequest",
-                        "webRequestBlocking"
-                    ],
-                    "background": {
-                        "scripts": ["background.js"]
-                    }
-                }
-                """
-                background_js = f"""
-                var config = {{
-                    mode: "fixed_servers",
-                    rules: {{
-                        singleProxy: {{
-                            scheme: "socks5",
-                            host: "{host}",
-                            port: {port}
-                        }},
-                        bypassList: ["localhost"]
-                    }}
-                }};
-                chrome.proxy.settings.set({{value: config, scope: "regular"}}, function() {{}});
-                function callbackFn(details) {{
-                    return {{
-                        authCredentials: {{
-                            username: "{username}",
-                            password: "{password}"
-                        }}
-                    }};
-                }}
-                chrome.webRequest.onAuthRequired.addListener(
-                    callbackFn,
-                    {{urls: ["<all_urls>"]}},
-                    ['blocking']
-                );
-                """
-                plugin_dir = "proxy_auth_plugin"
-                if not os.path.exists(plugin_dir):
-                    os.makedirs(plugin_dir)
-                with open(os.path.join(plugin_dir, "manifest.json"), "w") as f:
-                    f.write(manifest_json)
-                with open(os.path.join(plugin_dir, "background.js"), "w") as f:
-                    f.write(background_js)
-
-                options.add_argument(f"--load-extension={os.path.abspath(plugin_dir)}")
+                plugin_dir = get_proxy_auth_extension(proxy, host, port, username, password)
+                options.add_argument(f"--load-extension={plugin_dir}")
                 print(f"Using SOCKS proxy with auth plugin: {host}:{port}")
             else:
                 # No credentials, just host:port
@@ -235,103 +1180,628 @@ def get_html(url, wait_selector=None):
         options.add_argument(f"--proxy-server={proxy}")
         print(f"Using proxy: {proxy}")
 
-    driver = None
+    return options
+
+
+RESOURCE_TYPE_PATTERNS = {
+    "image": ["*.png*", "*.jpg*", "*.jpeg*", "*.gif*", "*.webp*", "*.avif*", "*.svg*", "*.ico*"],
+    "font": ["*.woff*", "*.ttf*", "*.otf*", "*.eot*"],
+    "media": ["*.mp4*", "*.webm*", "*.mp3*", "*.m3u8*", "*.ogg*", "*.wav*"],
+    "stylesheet": ["*.css*"],
+}
+
+
+def get_blocked_url_patterns():
+    patterns = []
+    for resource_type in BLOCKED_RESOURCE_TYPES:
+        patterns.extend(RESOURCE_TYPE_PATTERNS.get(resource_type, []))
+    patterns.extend(BLOCKED_URL_PATTERNS)
+
+    # Chrome can't unblock a URL once a pattern matches it, so leave out any pattern that would catch an allowed URL
+    allowed_patterns = []
+    for pattern in patterns:
+        if any(fnmatch.fnmatchcase(url, pattern) for url in RESOURCE_ALLOWLIST):
+            print(f"Not blocking '{pattern}' because it matches an allowlisted URL")
+        elif pattern not in allowed_patterns:
+            allowed_patterns.append(pattern)
+    return allowed_patterns
+
+
+def apply_resource_blocking(driver):
+    if not BLOCK_RESOURCES:
+        return
+    patterns = get_blocked_url_patterns()
+    if not patterns:
+        return
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns})
+
+
+PAGE_WEIGHT_SCRIPT = """
+const nav = performance.getEntriesByType('navigation')[0] || {};
+const resources = performance.getEntriesByType('resource');
+return {
+    bytes: (nav.transferSize || 0) + resources.reduce((total, r) => total + (r.transferSize || 0), 0),
+    requests: resources.length + 1,
+    dom_ready_ms: nav.domContentLoadedEventEnd || 0
+};
+"""
+
+
+def report_page_weight(driver):
+    # transferSize is 0 for cross-origin responses without Timing-Allow-Origin, so this is a lower bound
+    try:
+        weight = driver.execute_script(PAGE_WEIGHT_SCRIPT)
+    except Exception as e:
+        print(f"Could not read page weight: {e}")
+        return
+    print(f"Page weight: {weight['bytes'] / 1024:.0f} KB over {weight['requests']} requests, "
+          f"DOM ready after {weight['dom_ready_ms'] / 1000:.1f}s")
+    metrics.inc("upwork_alerts_page_bytes_total", weight['bytes'])
+    metrics.inc("upwork_alerts_page_requests_total", weight['requests'])
+    metrics.observe("upwork_alerts_dom_ready_seconds", weight['dom_ready_ms'] / 1000)
+
+
+def create_driver(proxy, user_agent, retry_driver=True):
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service
     try:
         driver = webdriver.Chrome(
-            service=Service(ChromeDriverManager().install()),
-            options=options
+            service=Service(get_chromedriver_path()),
+            options=build_chrome_options(proxy, user_agent)
         )
+    except Exception as e:
+        if not retry_driver or not _chromedriver_from_cache:
+            raise
+        # Usually a cached chromedriver that no longer matches the installed Chrome
+        print(f"Chrome failed to start ({e}), resolving chromedriver again")
+        get_chromedriver_path(refresh=True)
+        return create_driver(proxy, user_agent, retry_driver=False)
+    try:
         driver.set_window_size(1920, 1080)
         driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {
             "source": "Object.defineProperty(navigator, 'webdriver', {get: () => undefined})"
         })
+        driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {
+            "source": "performance.setResourceTimingBufferSize(1000)"
+        })
+        driver.execute_cdp_cmd("Performance.enable", {})
+        apply_resource_blocking(driver)
+    except Exception:
+        driver.quit()
+        raise
+    return driver
 
-        driver.get(url)
-        print("Waiting for page to load...")
-        time.sleep(random.uniform(3, 5))
 
-        # Mimic human-like scrolling
-        for _ in range(3):
-            scroll_amount = random.randint(300, 1000)
-            driver.execute_script(f"window.scrollBy(0, {scroll_amount});")
-            time.sleep(random.uniform(0.1, 0.9))
+# ---------------------------
+# Browser Pool
+# ---------------------------
 
-        if wait_selector:
-            try:
-                WebDriverWait(driver, 15).until(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, wait_selector))
-                )
-            except Exception as e:
-                print(f"Timeout waiting for selector '{wait_selector}'")
+class PooledDriver:
+    def __init__(self, driver, proxy, user_agent):
+        self.driver = driver
+        self.proxy = proxy
+        self.user_agent = user_agent
+        self.pages_served = 0
+        self.created_at = time.time()
+        self.healthy = True
 
-        html_content = driver.page_source
-        print(f"Response length: {len(html_content)} bytes")
+    def is_alive(self):
+        if not self.healthy:
+            return False
+        try:
+            self.driver.execute_script("return 1")
+            return True
+        except Exception as e:
+            print(f"Browser health check failed: {e}")
+            self.healthy = False
+            return False
 
-        return html_content
+    def memory_mb(self):
+        try:
+            metrics = self.driver.execute_cdp_cmd("Performance.getMetrics", {})
+        except Exception:
+            return 0
+        for metric in metrics.get("metrics", []):
+            if metric.get("name") == "JSHeapTotalSize":
+                return metric.get("value", 0) / (1024 * 1024)
+        return 0
 
-    except Exception as e:
-        print(f"Error fetching HTML: {e}")
-        return ""
-    finally:
-        if driver:
-            driver.quit()
+    def needs_recycle(self):
+        if not self.healthy:
+            return True
+        if self.pages_served >= BROWSER_MAX_PAGES:
+            print(f"Recycling browser after {self.pages_served} pages")
+            return True
+        memory = self.memory_mb()
+        if memory > BROWSER_MAX_MEMORY_MB:
+            print(f"Recycling browser using {memory:.0f} MB of JS heap")
+            return True
+        return False
 
+    def quit(self):
+        try:
+            self.driver.quit()
+        except Exception as e:
+            print(f"Error closing browser: {e}")
 
-def extract_text(element, selector, default=""):
-    if not element:
-        return default
-        
-    try:
-        found = element.select_one(selector)
-        if found:
-            return found.get_text(strip=True)
-    except Exception as e:
-        print(f"Error extracting text with selector '{selector}': {str(e)}")
-        
-    return default
 
+class BrowserPool:
+    def __init__(self, size):
+        self.size = max(1, size)
+        self._idle = []
+        self._total = 0
+        self._proxy_load = {}
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def _reserve_proxy(self):
+        # Returns (proxy, True) when a new browser may be started, (None, False) when every proxy is at its limit
+        proxies = PROXY_LIST if USE_PROXY else []
+        if not proxies:
+            return None, True
+        available = [p for p in proxies if self._proxy_load.get(p, 0) < MAX_BROWSERS_PER_PROXY]
+        if not available:
+            return None, False
+        proxy = get_proxy(available)
+        self._proxy_load[proxy] = self._proxy_load.get(proxy, 0) + 1
+        return proxy, True
+
+    def _acquire(self):
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("Browser pool is closed")
+                if self._idle:
+                    pooled = self._idle.pop()
+                    break
+                if self._total < self.size:
+                    proxy, reserved = self._reserve_proxy()
+                    if reserved:
+                        pooled = None
+                        self._total += 1
+                        break
+                self._cond.wait()
+
+        if pooled is not None:
+            if pooled.is_alive():
+                return pooled
+            pooled.quit()
+            self._discard(pooled.proxy)
+            return self._acquire()
 
-def extract_first_match(element, selectors, default=""):
-    if not element:
-        return default
-        
-    for selector in selectors:
         try:
-            found = element.select_one(selector)
-            if found:
-                return found.get_text(strip=True)
+            user_agent = get_user_agent()
+            print("Starting new pooled browser")
+            start = time.perf_counter()
+            pooled = PooledDriver(create_driver(proxy, user_agent), proxy, user_agent)
+            metrics.observe("upwork_alerts_browser_start_seconds", time.perf_counter() - start)
+            return pooled
+        except Exception:
+            self._discard(proxy)
+            raise
+
+    def _discard(self, proxy):
+        with self._cond:
+            self._total -= 1
+            if proxy in self._proxy_load:
+                self._proxy_load[proxy] -= 1
+            self._cond.notify_all()
+
+    def _release(self, pooled):
+        if self._closed or pooled.needs_recycle():
+            pooled.quit()
+            self._discard(pooled.proxy)
+            return
+        with self._cond:
+            self._idle.append(pooled)
+            self._cond.notify()
+
+    @contextmanager
+    def borrow(self):
+        pooled = self._acquire()
+        try:
+            yield pooled
+        finally:
+            self._release(pooled)
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._total -= len(idle)
+            for pooled in idle:
+                if pooled.proxy in self._proxy_load:
+                    self._proxy_load[pooled.proxy] -= 1
+            self._cond.notify_all()
+        for pooled in idle:
+            pooled.quit()
+
+
+browser_pool = None
+_browser_pool_lock = threading.Lock()
+
+
+def get_browser_pool():
+    global browser_pool
+    # Every fetch asks for the pool, so only take the lock while it still has to be built
+    pool = browser_pool
+    if pool is not None:
+        return pool
+    with _browser_pool_lock:
+        if browser_pool is None:
+            browser_pool = BrowserPool(BROWSER_POOL_SIZE)
+        return browser_pool
+
+
+def close_browser_pool():
+    global browser_pool
+    with _browser_pool_lock:
+        if browser_pool is not None:
+            browser_pool.close()
+            browser_pool = None
+
+
+# ---------------------------
+# Page Readiness
+# ---------------------------
+
+# Each script returns [sections filled in, sections present, document loaded, empty notice shown] for the page kind
+SEARCH_READY_SCRIPT = """
+const tiles = document.querySelectorAll('article[data-test="JobTile"], article.job-tile');
+let filled = 0;
+for (const tile of tiles) {
+    const title = tile.querySelector(arguments[0]);
+    if (title && title.textContent.trim()) filled++;
+}
+const empty = !!document.querySelector(arguments[1]);
+return [filled, tiles.length, document.readyState === 'complete', empty];
+"""
+
+# Notices Upwork shows instead of job content: a search without results, a posting that was removed or made private
+EMPTY_PAGE_SELECTORS = {
+    "search": [
+        '[data-test="EmptyState"]',
+        '[data-test="empty-state"]',
+        '.air3-empty-state',
+    ],
+    "posting": [
+        '[data-test="JobUnavailable"]',
+        '[data-test="job-unavailable"]',
+        '.air3-empty-state',
+    ],
+}
+
+POSTING_READY_SECTIONS = [
+    '[data-test="Description"]',
+    '[data-test="AboutClientVisitor"]',
+    '[data-test="ClientActivity"]',
+]
+
+POSTING_READY_SCRIPT = """
+const complete = document.readyState === 'complete';
+const empty = !!document.querySelector(arguments[1]);
+if (!document.querySelector('[data-test="JobDetailsVisitor"]')) return [0, 0, complete, empty];
+let filled = 0, present = 0;
+for (const selector of arguments[0]) {
+    const section = document.querySelector(selector);
+    if (!section) continue;
+    present++;
+    if (section.textContent.trim()) filled++;
+}
+return [filled, present, complete, empty];
+"""
+
+
+def expected_ready_count(page_kind, url):
+    if page_kind == "search":
+        per_page = parse_qs(urlparse(url).query).get('per_page', [''])[0]
+        return int(per_page) if per_page.isdigit() else SEARCH_RESULTS_PER_PAGE
+    return len(POSTING_READY_SECTIONS)
+
+
+def read_page_progress(driver, page_kind):
+    empty_selector = ", ".join(EMPTY_PAGE_SELECTORS["search" if page_kind == "search" else "posting"])
+    if page_kind == "search":
+        progress = driver.execute_script(SEARCH_READY_SCRIPT, ", ".join(TITLE_SELECTORS), empty_selector)
+    else:
+        progress = driver.execute_script(POSTING_READY_SCRIPT, POSTING_READY_SECTIONS, empty_selector)
+    return tuple(progress)
+
+
+def wait_until_ready(driver, page_kind, expected):
+    # Done once the expected content is filled in, or once everything that rendered is filled in
+    # and has stopped changing (a search with fewer results than a full page, a posting without client activity).
+    # A loaded page with nothing to fill in (no results, a removed posting) is "empty" once it stops changing
+    deadline = time.monotonic() + PAGE_READY_TIMEOUT
+    last_progress = None
+    stable_since = time.monotonic()
+    while True:
+        try:
+            progress = read_page_progress(driver, page_kind)
+        except Exception:
+            progress = (0, 0, False, False)
+        filled, present, complete, empty = progress
+
+        now = time.monotonic()
+        if progress != last_progress:
+            last_progress = progress
+            stable_since = now
+
+        if filled >= expected:
+            return "ready"
+        if filled and filled == present and now - stable_since >= PAGE_READY_STABLE_TIME:
+            return "settled"
+        if not present and complete:
+            quiet = now - stable_since
+            if quiet >= (PAGE_READY_STABLE_TIME if empty else PAGE_READY_EMPTY_TIME):
+                return "empty"
+        if now >= deadline:
+            print(f"Timed out waiting for {page_kind} page content ({filled} of {expected} filled in)")
+            return "timeout"
+        time.sleep(PAGE_READY_POLL_INTERVAL)
+
+
+def pace_like_human(driver):
+    low, high = HUMAN_PACING_DELAY
+    pause = random.uniform(low, high)
+    scrolls = max(HUMAN_PACING_SCROLLS, 1)
+    for _ in range(scrolls):
+        driver.execute_script(f"window.scrollBy(0, {random.randint(300, 1000)});")
+        time.sleep(pause / scrolls)
+
+
+def get_html(url, page_kind=None, pooled=None):
+    if pooled is None:
+        with get_browser_pool().borrow() as pooled:
+            return get_html(url, page_kind, pooled)
+
+    start = time.perf_counter()
+    html_content, outcome = load_page(url, page_kind, pooled)
+    elapsed = time.perf_counter() - start
+    # Empty pages settle on their own, so a readiness timeout means the proxy is too slow to fill the page
+    # in. It counts as a failure; only successes add a latency sample, so the wait doesn't skew the average
+    if get_proxy_manager().record(pooled.proxy, outcome, elapsed):
+        # Don't hand this browser out again while its proxy is resting
+        pooled.healthy = False
+    proxy = redact_proxy(pooled.proxy)
+    metrics.observe("upwork_alerts_get_html_seconds", elapsed, proxy=proxy)
+    metrics.inc("upwork_alerts_fetches_total", path="browser", proxy=proxy, outcome=outcome)
+    if outcome == "blocked":
+        # A challenge page is a failed fetch, not a page without jobs
+        return None, outcome
+    return html_content, outcome
+
+
+# When set, called as page_fetcher(url, page_kind) instead of the HTTP fast path and Chrome, and returns the
+# page HTML or None. benchmarks/replay_harness.py uses it to feed recorded pages through the whole pipeline
+page_fetcher = None
+
+
+def fetch_rendered_html(url, page_kind):
+    if page_fetcher is not None:
+        html_content = page_fetcher(url, page_kind)
+        record_fetch_path("replay", "success" if html_content else "error")
+        return html_content
+
+    with get_browser_pool().borrow() as pooled:
+        html_content, outcome = get_html(url, page_kind=page_kind, pooled=pooled)
+    if html_content:
+        outcome = "success"
+    elif outcome == "success":
+        outcome = "error"
+    record_fetch_path("browser", outcome)
+    return html_content
+
+
+def load_page(url, page_kind, pooled):
+    print(f"Fetching HTML for {url}")
+
+    driver = pooled.driver
+    report_first_fetch("browser")
+    try:
+        navigate_start = time.perf_counter()
+        driver.get(url)
+        pooled.pages_served += 1
+        metrics.observe("upwork_alerts_page_load_seconds", time.perf_counter() - navigate_start)
+
+        outcome = "success"
+        if page_kind:
+            print("Waiting for page content...")
+            ready_start = time.perf_counter()
+            readiness = wait_until_ready(driver, page_kind, expected_ready_count(page_kind, url))
+            ready_time = time.perf_counter() - ready_start
+            print(f"Page content {readiness} after {ready_time:.2f}s")
+            metrics.observe("upwork_alerts_page_ready_seconds", ready_time, page=page_kind, outcome=readiness)
+            if readiness == "timeout":
+                metrics.inc("upwork_alerts_wait_timeouts_total", page=page_kind)
+                outcome = "timeout"
+
+        if HUMAN_PACING:
+            pacing_start = time.perf_counter()
+            pace_like_human(driver)
+            metrics.observe("upwork_alerts_page_pacing_seconds", time.perf_counter() - pacing_start)
+
+        html_content = driver.page_source
+        print(f"Response length: {len(html_content)} bytes")
+        report_page_weight(driver)
+        if is_blocked_page(html_content):
+            print("Browser got a bot protection page")
+            outcome = "blocked"
+
+        return html_content, outcome
+
+    except Exception as e:
+        print(f"Error fetching HTML: {e}")
+        pooled.healthy = False
+        return "", "error"
+
+
+# ---------------------------
+# Selector Registry
+# ---------------------------
+
+class SelectorGroup:
+    # Fallback selectors for one field, compiled once. The first selector is what Upwork uses now and is always
+    # tried first, so a falling hit rate on it means the markup has changed. Among the fallbacks, the one that
+    # matched last is tried first. Catch-all selectors that also match unrelated elements are only tried after
+    # all the others and never move up, so one odd tile can't make them win for the rest. With required=False
+    # a field may legitimately be missing, like a job's skills, so lookups that match nothing don't count
+    # against the primary selector
+    def __init__(self, name, selectors, required=True, catch_all=()):
+        self.name = name
+        self.selectors = list(selectors)
+        self.required = required
+        self.catch_all = [self.selectors.index(selector) for selector in catch_all]
+        self.compiled = None
+        self.fallback = next((index for index in range(1, len(self.selectors)) if index not in self.catch_all), None)
+        self.last = 0  # Selector of the latest match, for debug output
+        self.lock = threading.Lock()
+        self.recent = deque(maxlen=SELECTOR_DRIFT_WINDOW)  # 1 primary selector hit, 0 fallback hit or no match
+        self.drifting = False
+
+    def _order(self):
+        if self.compiled is None:
+            import soupsieve
+            self.compiled = [soupsieve.compile(selector) for selector in self.selectors]
+        fallback = self.fallback
+        others = [index for index in range(1, len(self.compiled)) if index != fallback and index not in self.catch_all]
+        return [0] + ([] if fallback is None else [fallback]) + others + self.catch_all
+
+    def _record(self, index):
+        with self.lock:
+            if index is not None:
+                self.last = index
+            elif not self.required:
+                return
+            self.recent.append(1 if index == 0 else 0)
+            if index and index != self.fallback and index not in self.catch_all:
+                print(f"{self.name} fallback selector now '{self.selectors[index]}' instead of '{self.selectors[self.fallback]}'")
+                self.fallback = index
+            check = len(self.recent) == self.recent.maxlen
+            primary_rate = sum(self.recent) / len(self.recent)
+        if check:
+            self._check_drift(primary_rate)
+
+    def _check_drift(self, primary_rate):
+        metrics.set("upwork_alerts_selector_primary_ratio", primary_rate, group=self.name)
+        with self.lock:
+            if primary_rate >= SELECTOR_DRIFT_THRESHOLD:
+                self.drifting = False
+                return
+            # Latched until the primary selector recovers, so a lasting change alerts once
+            if self.drifting:
+                return
+            self.drifting = True
+            fallback = self.selectors[self.last]
+        warning = (f"Upwork markup may have changed: the {self.name} selector '{self.selectors[0]}' matched only "
+                   f"{primary_rate:.0%} of the last {self.recent.maxlen} lookups. The fallback '{fallback}' is "
+                   f"covering for now; update {self.name.upper()}_SELECTORS before it stops matching too")
+        print(f"WARNING: {warning}")
+        metrics.inc("upwork_alerts_selector_drift_total", group=self.name)
+        if SELECTOR_DRIFT_ALERTS:
+            send_telegram_message(f"<b>⚠️ Selector drift</b>\n{html.escape(warning)}")
+
+    def select_one(self, element):
+        for index in self._order():
+            found = self.compiled[index].select_one(element)
+            if found is not None:
+                self._record(index)
+                return found
+        self._record(None)
+        return None
+
+    def select(self, element):
+        for index in self._order():
+            found = self.compiled[index].select(element)
+            if found:
+                self._record(index)
+                return found
+        self._record(None)
+        return []
+
+    def status(self):
+        with self.lock:
+            rate = sum(self.recent) / len(self.recent) if self.recent else 1
+            return f"{self.name} {rate:.0%} on '{self.selectors[0]}'"
+
+
+SELECTOR_GROUPS = {}
+
+
+def selector_group(name, selectors, required=True, catch_all=()):
+    group = SELECTOR_GROUPS[name] = SelectorGroup(name, selectors, required, catch_all)
+    return group
+
+
+def selector_summary():
+    return "Selectors - " + "; ".join(group.status() for group in SELECTOR_GROUPS.values())
+
+
+def extract_text(element, selector, default=""):
+    if not element:
+        return default
+        
+    try:
+        found = element.select_one(selector)
+        if found:
+            return found.get_text(strip=True)
+    except Exception as e:
+        print(f"Error extracting text with selector '{selector}': {str(e)}")
+        
+    return default
+
+
+def extract_first_match(element, selectors, default=""):
+    if not element:
+        return default
+        
+    for selector in selectors:
+        try:
+            found = element.select_one(selector)
+            if found:
+                return found.get_text(strip=True)
         except Exception:
             continue
     
     return default
 
 
+TITLE_SELECTORS = [
+    'h2.job-tile-title a',
+    'h2.h5.job-tile-title a',
+    '[data-test="job-tile-title-link"]',
+    '[data-test="job-tile-title"] a',
+    'a.air3-link'
+]
+
+SKILL_SELECTORS = [
+    '[data-test="TokenClamp JobAttrs"] [data-test="token"]',
+    '[data-test="TokenClamp"] [data-test="token"]',
+    '.air3-token-container [data-test="token"]',
+    '.skills-list [data-test="Skill"] span.air3-badge'
+]
+
+# Any link styled like a title, which also matches client and skill links, so only a last resort
+title_selectors = selector_group("title", TITLE_SELECTORS, catch_all=['a.air3-link'])
+skill_selectors = selector_group("skill", SKILL_SELECTORS, required=False)
+
+
 def extract_job_info_from_search(job_element):
     if not job_element:
         return None
         
     try:
-        # Print job element structure for debugging
-        print(f"Analyzing job tile with classes: {job_element.get('class', '')}")
+        if DEBUG_TILES:
+            print(f"Analyzing job tile with classes: {job_element.get('class', '')}")
         
         job_uid = job_element.get('data-ev-job-uid', '')
         if not job_uid:
             job_uid = job_element.get('data-test-key', '')
         
-        title_element = None
-        potential_title_selectors = [
-            'h2.job-tile-title a',
-            'h2.h5.job-tile-title a',
-            '[data-test="job-tile-title-link"]',
-            '[data-test="job-tile-title"] a',
-            'a.air3-link'
-        ]
-        
-        for selector in potential_title_selectors:
-            title_element = job_element.select_one(selector)
-            if title_element:
-                print(f"Found title element using selector: {selector}")
-                break
+        title_element = title_selectors.select_one(job_element)
+        if title_element and DEBUG_TILES:
+            print(f"Found title element using selector: {title_selectors.selectors[title_selectors.last]}")
                 
         job_title = title_element.get_text(strip=True) if title_element else "Unknown Title"
         job_url = title_element.get('href', '') if title_element else ""
@@ -383,27 +1853,11 @@ def extract_job_info_from_search(job_element):
         description = extract_text(job_element, '.air3-line-clamp p', "No description provided")
         
         skills = []
-        skill_selectors = [
-            '[data-test="TokenClamp"] [data-test="token"]',
-            '[data-test="TokenClamp JobAttrs"] [data-test="token"]',
-            '.air3-token-container [data-test="token"]',
-            '.skills-list [data-test="Skill"] span.air3-badge'
-        ]
-        
-        for selector in skill_selectors:
-            skill_elements = job_element.select(selector)
-            if skill_elements:
-                for skill in skill_elements:
-                    if skill.select_one('span'):
-                        skill_text = skill.select_one('span').get_text(strip=True)
-                    else:
-                        skill_text = skill.get_text(strip=True)
-                    
-                    if skill_text:
-                        skills.append(skill_text)
-                
-                if skills:
-                    break
+        for skill in skill_selectors.select(job_element):
+            span = skill.find('span')
+            skill_text = (span or skill).get_text(strip=True)
+            if skill_text:
+                skills.append(skill_text)
         
         return {
             "job_uid": job_uid,
@@ -428,7 +1882,7 @@ def extract_job_info_from_posting(html_content, job_info):
         return job_info
     
     try:
-        soup = BeautifulSoup(html_content, BS4_PARSER)
+        soup = make_soup(html_content)
         
         description_elem = soup.select_one('[data-test="Description"] p')
         if description_elem:
@@ -490,39 +1944,20 @@ def extract_job_info_from_posting(html_content, job_info):
         
         activity_section = soup.select_one('[data-test="ClientActivity"]')
         if activity_section:
-            proposals = extract_text(activity_section, 'li:nth-of-type(1) .value')
-            job_info["proposals"] = proposals
-            
-            last_viewed = ""
-            last_viewed_item = activity_section.select_one('li:nth-of-type(2)')
-            if last_viewed_item and 'Last viewed' in last_viewed_item.get_text():
-                last_viewed = extract_text(last_viewed_item, '.value')
-            job_info["last_viewed"] = last_viewed
-            
-            interviewing = extract_text(activity_section, 'li .value:-soup-contains("Interviewing")')
-            if not interviewing: 
-                interviewing_items = activity_section.select('li')
-                for item in interviewing_items:
-                    if 'Interviewing' in item.get_text():
-                        interviewing = extract_text(item, '.value')
-                        break
-            job_info["interviewing"] = interviewing
-            
-            invites_sent = ""
-            invites_items = activity_section.select('li')
-            for item in invites_items:
-                if 'Invites sent' in item.get_text():
-                    invites_sent = extract_text(item, '.value')
-                    break
-            job_info["invites_sent"] = invites_sent
-            
-            unanswered_invites = ""
-            unanswered_items = activity_section.select('li')
-            for item in unanswered_items:
-                if 'Unanswered invites' in item.get_text():
-                    unanswered_invites = extract_text(item, '.value')
-                    break
-            job_info["unanswered_invites"] = unanswered_invites
+            # One pass over the activity list, then each field is looked up by its label
+            activity = []
+            for item in activity_section.find_all('li'):
+                value = item.select_one('.value')
+                activity.append((item.get_text(), value.get_text(strip=True) if value else ""))
+
+            def activity_value(label):
+                return next((value for text, value in activity if label in text), "")
+
+            job_info["proposals"] = activity[0][1] if activity else ""
+            job_info["last_viewed"] = activity[1][1] if len(activity) > 1 and 'Last viewed' in activity[1][0] else ""
+            job_info["interviewing"] = activity_value('Interviewing')
+            job_info["invites_sent"] = activity_value('Invites sent')
+            job_info["unanswered_invites"] = activity_value('Unanswered invites')
         
         job_info["full_details_fetched"] = True
         return job_info
@@ -532,6 +1967,12 @@ def extract_job_info_from_posting(html_content, job_info):
         return job_info
 
 
+def describe_search(search_url):
+    query = parse_qs(urlparse(search_url).query)
+    label = query.get('q', [''])[0] or urlparse(search_url).path.rstrip('/').split('/')[-1] or search_url
+    return html.escape(label)
+
+
 def create_telegram_message(job_info):
     try:
         message = [
@@ -547,6 +1988,10 @@ def create_telegram_message(job_info):
         if skills:
             message.append(f"<b>🔧 Skills:</b> {', '.join(skills)}")
         
+        matched_searches = job_info.get('matched_searches', [])
+        if matched_searches and len(SEARCH_URLS) > 1:
+            message.append(f"<b>🔎 Searches:</b> {', '.join(describe_search(url) for url in matched_searches)}")
+        
         client_info = []
         if job_info.get('client_member_since'):
             client_info.append(f"<b>👤 Client Since:</b> {job_info.get('client_member_since')}")
@@ -592,14 +2037,560 @@ def create_telegram_message(job_info):
         return f"New Job: {job_info.get('title', 'Unknown')} - See details at {job_info.get('url', '')}"
 
 
-def process_job_posting(job_info):
+# ---------------------------
+# HTTP Fast Path
+# ---------------------------
+
+# Markers of Upwork's bot protection pages, which come back instead of the real page when a request is blocked
+# Only what an actual challenge page consists of. Cloudflare also injects its challenge-platform script into
+# normal pages, so script URLs and class names alone don't mean we were blocked
+BLOCKED_PAGE_PATTERNS = [
+    re.compile(r'<title[^>]*>\s*(?:Just a moment\.\.\.|Attention Required! \| Cloudflare|Access denied'
+               r'|Access to this page has been denied|Please verify you are a human)', re.I),
+    re.compile(r'<form[^>]+id="challenge-form"', re.I),
+    re.compile(r'<div[^>]+id="(?:cf-challenge-running|challenge-stage|px-captcha)"', re.I),
+    re.compile(r'<iframe[^>]+src="https://[^"]*captcha-delivery\.com/captcha', re.I),
+]
+
+
+def is_blocked_page(html_content):
+    return any(pattern.search(html_content) for pattern in BLOCKED_PAGE_PATTERNS)
+
+EMBEDDED_STATE_PATTERNS = [
+    ("devalue", re.compile(r'<script[^>]*id="__NUXT_DATA__"[^>]*>(.*?)</script>', re.S)),
+    ("json", re.compile(r'<script[^>]*id="__NEXT_DATA__"[^>]*>(.*?)</script>', re.S)),
+    ("json", re.compile(r'window\.__INITIAL_STATE__\s*=\s*(\{.*?\})\s*;?\s*</script>', re.S)),
+    ("json", re.compile(r'window\.__NUXT__\s*=\s*(\{.*?\})\s*;?\s*</script>', re.S)),
+]
+
+EXPERIENCE_TIERS = {1: "Entry level", 2: "Intermediate", 3: "Expert"}
+
+fetch_path_stats = Counter()
+_fetch_path_stats_lock = threading.Lock()
+_http_local = threading.local()
+
+
+def record_fetch_path(path, outcome):
+    with _fetch_path_stats_lock:
+        fetch_path_stats[(path, outcome)] += 1
+
+
+def fetch_path_summary():
+    with _fetch_path_stats_lock:
+        stats = dict(fetch_path_stats)
+    parts = []
+    for path in ("http", "browser", "replay"):
+        outcomes = {outcome: count for (p, outcome), count in stats.items() if p == path}
+        total = sum(outcomes.values())
+        if total:
+            details = ", ".join(f"{outcome} {count}" for outcome, count in sorted(outcomes.items()))
+            parts.append(f"{path}: {outcomes.get('success', 0) / total:.0%} success ({details})")
+    return "Fetch paths - " + ("; ".join(parts) if parts else "no fetches yet")
+
+
+def get_http_session():
+    session = getattr(_http_local, "session", None)
+    if session is None:
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=4)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        _http_local.session = session
+    return session
+
+
+_first_fetch_reported = False
+
+
+def report_first_fetch(path):
+    # How long the process took from starting to its first Upwork request, which is what a timer run pays every time
+    global _first_fetch_reported
+    if _first_fetch_reported:
+        return
+    _first_fetch_reported = True
+    elapsed = time.perf_counter() - PROCESS_START
+    print(f"First fetch ({path}) started {elapsed:.2f}s after process start")
+    metrics.set("upwork_alerts_start_to_first_fetch_seconds", elapsed, path=path)
+
+
+def fetch_html_http(url):
+    report_first_fetch("http")
+    proxy = get_proxy()
+    headers = {
+        "User-Agent": get_user_agent(),
+        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+        "Accept-Language": "en-US,en;q=0.9",
+    }
+    proxies = {"http": proxy, "https": proxy} if proxy else None
+
+    start = time.perf_counter()
+    html_content, outcome = request_html_http(url, headers, proxies)
+    get_proxy_manager().record(proxy, outcome, time.perf_counter() - start)
+    metrics.inc("upwork_alerts_fetches_total", path="http", proxy=redact_proxy(proxy), outcome=outcome)
+    return html_content, outcome
+
+
+def request_html_http(url, headers, proxies):
+    start = time.perf_counter()
+    try:
+        response = get_http_session().get(url, headers=headers, proxies=proxies, timeout=HTTP_TIMEOUT)
+    except requests.RequestException as e:
+        print(f"Fast path request failed: {e}")
+        return None, "error"
+    finally:
+        metrics.observe("upwork_alerts_http_fetch_seconds", time.perf_counter() - start)
+
+    html_content = response.text
+    if response.status_code in (403, 429, 503) or is_blocked_page(html_content):
+        print(f"Fast path blocked with status {response.status_code}")
+        return None, "blocked"
+    if response.status_code != 200:
+        print(f"Fast path got unexpected status {response.status_code}")
+        return None, "error"
+    return html_content, "success"
+
+
+def revive_devalue(data):
+    # Nuxt serializes its state as a flat list where containers refer to other entries by index
+    if not isinstance(data, list) or not data:
+        return data
+
+    revived = {}
+    wrappers = ("Reactive", "ShallowReactive", "Ref", "ShallowRef", "NuxtError")
+
+    def hydrate(index):
+        if not isinstance(index, int) or index < 0 or index >= len(data):
+            return None
+        if index in revived:
+            return revived[index]
+
+        value = data[index]
+        if isinstance(value, list):
+            if value and isinstance(value[0], str):
+                tag = value[0]
+                if tag in wrappers:
+                    result = hydrate(value[1]) if len(value) > 1 else None
+                elif tag in ("Date", "BigInt"):
+                    result = value[1] if len(value) > 1 else None
+                elif tag == "Set":
+                    result = [hydrate(i) for i in value[1:]]
+                elif tag == "Map":
+                    result = {hydrate(value[i]): hydrate(value[i + 1]) for i in range(1, len(value) - 1, 2)}
+                else:
+                    result = None
+                revived[index] = result
+                return result
+            result = []
+            revived[index] = result
+            result.extend(hydrate(i) for i in value)
+        elif isinstance(value, dict):
+            result = {}
+            revived[index] = result
+            for key, child in value.items():
+                result[key] = hydrate(child)
+        else:
+            result = value
+            revived[index] = result
+        return result
+
+    try:
+        return hydrate(0)
+    except RecursionError:
+        print("Embedded page state is nested too deeply to read")
+        return None
+
+
+def extract_embedded_state(html_content):
+    for kind, pattern in EMBEDDED_STATE_PATTERNS:
+        match = pattern.search(html_content)
+        if not match:
+            continue
+        try:
+            data = json.loads(match.group(1))
+        except ValueError:
+            continue
+        return revive_devalue(data) if kind == "devalue" else data
+    return None
+
+
+def find_dicts(state, predicate):
+    found = []
+    seen = set()
+    stack = [state]
+    while stack:
+        node = stack.pop()
+        if id(node) in seen:
+            continue
+        if isinstance(node, dict):
+            seen.add(id(node))
+            if predicate(node):
+                found.append(node)
+            stack.extend(reversed(list(node.values())))
+        elif isinstance(node, list):
+            seen.add(id(node))
+            stack.extend(reversed(node))
+    return found
+
+
+def parse_state_time(value):
+    if not value:
+        return None
+    try:
+        if isinstance(value, (int, float)):
+            return datetime.fromtimestamp(value / 1000 if value > 1e11 else value, tz=timezone.utc)
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except (ValueError, OverflowError, OSError):
+        return None
+
+
+def format_posted_time(value):
+    posted = parse_state_time(value)
+    if not posted:
+        return "Unknown"
+    if posted.tzinfo is None:
+        posted = posted.replace(tzinfo=timezone.utc)
+    seconds = max(0, int((datetime.now(timezone.utc) - posted).total_seconds()))
+    for unit, size in (("day", 86400), ("hour", 3600), ("minute", 60)):
+        if seconds >= size:
+            count = seconds // size
+            return f"{count} {unit}{'s' if count != 1 else ''} ago"
+    return "just now"
+
+
+def format_money_short(amount):
+    try:
+        amount = float(amount)
+    except (TypeError, ValueError):
+        return None
+    for suffix, size in (("M", 1_000_000), ("K", 1_000)):
+        if amount >= size:
+            return f"${amount / size:.1f}".rstrip("0").rstrip(".") + suffix
+    return f"${amount:,.0f}"
+
+
+def state_amount(value):
+    if isinstance(value, dict):
+        value = value.get("amount", value.get("rawValue"))
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def is_search_job_state(node):
+    return "title" in node and ("ciphertext" in node or "uid" in node) and "description" in node
+
+
+def job_info_from_state(node):
+    job_uid = str(node.get("uid") or node.get("id") or "")
+    ciphertext = node.get("ciphertext") or ""
+    job_url = urljoin(BASE_URL, f"/jobs/{ciphertext}") if ciphertext else ""
+
+    job_type = None
+    budget = None
+    raw_type = str(node.get("type", "")).lower()
+    hourly = node.get("hourlyBudget") or {}
+    if raw_type in ("2", "hourly"):
+        job_type = "Hourly"
+        low, high = state_amount(hourly.get("min")), state_amount(hourly.get("max"))
+        if low and high:
+            budget = f"${low:.2f} - ${high:.2f} per hour"
+    elif raw_type in ("1", "fixed"):
+        job_type = "Fixed"
+        amount = state_amount(node.get("amount"))
+        if amount:
+            budget = f"${amount:,.2f}"
+
+    experience = node.get("tierText") or EXPERIENCE_TIERS.get(node.get("contractorTier")) or "Not specified"
+    duration_parts = [part for part in (node.get("durationLabel"), node.get("engagement")) if part]
+
+    skills = []
+    for skill in node.get("attrs") or node.get("skills") or []:
+        if isinstance(skill, dict):
+            skill = skill.get("prettyName") or skill.get("prefLabel") or skill.get("name")
+        if skill:
+            skills.append(str(skill))
+
+    return {
+        "job_uid": job_uid,
+        "title": node.get("title") or "Unknown Title",
+        "url": job_url,
+        "posted_time": format_posted_time(node.get("publishedOn") or node.get("createdOn")),
+        "job_type": job_type,
+        "budget": budget,
+        "experience_level": experience,
+        "duration": ", ".join(duration_parts) if duration_parts else "Not specified",
+        "description": (node.get("description") or "No description provided").strip(),
+        "skills": skills,
+        "full_details_fetched": False
+    }
+
+
+def extract_jobs_from_state(state):
+    jobs = []
+    seen_uids = set()
+    for node in find_dicts(state, is_search_job_state):
+        job_info = job_info_from_state(node)
+        if job_info["job_uid"] and job_info["job_uid"] not in seen_uids:
+            seen_uids.add(job_info["job_uid"])
+            jobs.append(job_info)
+    return jobs
+
+
+def apply_posting_state(state, job_info):
+    details = find_dicts(state, lambda node: isinstance(node.get("job"), dict) and "buyer" in node)
+    if not details:
+        return False
+
+    job = details[0]["job"]
+    buyer = details[0].get("buyer") or {}
+    if job.get("description"):
+        job_info["description"] = job["description"].strip()
+
+    company = buyer.get("company") or {}
+    member_since = parse_state_time(company.get("contractDate"))
+    if member_since:
+        job_info["client_member_since"] = f"Member since {member_since.strftime('%b %d, %Y')}"
+
+    location = buyer.get("location") or {}
+    if location.get("country"):
+        city = location.get("city")
+        job_info["client_location"] = f"{location['country']} ({city})" if city else location["country"]
+
+    stats = buyer.get("stats") or {}
+    client_spend = format_money_short(state_amount(stats.get("totalCharges")))
+    if client_spend:
+        job_info["client_spend"] = client_spend
+    if stats.get("totalJobsWithHires") is not None:
+        hires = f"{stats['totalJobsWithHires']} hires"
+        if stats.get("activeAssignmentsCount") is not None:
+            hires += f", {stats['activeAssignmentsCount']} active"
+        job_info["client_hires"] = hires
+    if stats.get("hoursCount"):
+        job_info["client_hours"] = f"{int(stats['hoursCount']):,} hours"
+
+    profile = company.get("profile") or {}
+    if profile.get("industry"):
+        size = profile.get("size")
+        job_info["client_company"] = f"{profile['industry']} ({size})" if size else profile["industry"]
+
+    activity = job.get("clientActivity") or {}
+    if activity.get("totalApplicants") is not None:
+        job_info["proposals"] = str(activity["totalApplicants"])
+    if activity.get("lastBuyerActivity"):
+        job_info["last_viewed"] = format_posted_time(activity["lastBuyerActivity"])
+    for field, key in (("interviewing", "totalInvitedToInterview"),
+                       ("invites_sent", "invitationsSent"),
+                       ("unanswered_invites", "unansweredInvites")):
+        if activity.get(key) is not None:
+            job_info[field] = str(activity[key])
+
+    job_info["full_details_fetched"] = True
+    return True
+
+
+def fetch_search_jobs_http(search_url, check_unchanged=False):
+    # With check_unchanged, a page with the same jobs as the last poll comes back as an empty job list
+    html_content, outcome = fetch_html_http(search_url)
+    if html_content is None:
+        record_fetch_path("http", outcome)
+        return None, None
+
+    # Server rendered tiles carry their uids, so an unchanged page is recognised before its state is decoded
+    tile_uids = [job_uid for job_uid, _ in scan_tile_uids(html_content)] if check_unchanged else []
+    if tile_uids and page_unchanged(search_url, tile_uids):
+        record_fetch_path("http", "success")
+        return [], html_content
+
+    state = extract_embedded_state(html_content)
+    jobs = extract_jobs_from_state(state) if state is not None else []
+    if not jobs:
+        print("Fast path page had no embedded job data, falling back to the browser")
+        record_fetch_path("http", "missing")
+        return None, html_content
+
+    record_fetch_path("http", "success")
+    print(f"Fast path found {len(jobs)} jobs in embedded page data")
+    if check_unchanged and not tile_uids and page_unchanged(search_url, [job["job_uid"] for job in jobs]):
+        return [], html_content
+    return jobs, html_content
+
+
+def fetch_posting_http(job_info):
+    html_content, outcome = fetch_html_http(job_info['url'])
+    if html_content is None:
+        record_fetch_path("http", outcome)
+        return None
+
+    state = extract_embedded_state(html_content)
+    if state is None or not apply_posting_state(state, job_info):
+        print("Fast path posting had no embedded job data, falling back to the browser")
+        record_fetch_path("http", "missing")
+        return None
+
+    record_fetch_path("http", "success")
+    return html_content
+
+
+# ---------------------------
+# Job Detail Cache
+# ---------------------------
+
+POSTING_FIELDS = [
+    "description", "client_member_since", "client_location", "client_spend", "client_hires",
+    "client_hours", "client_company", "proposals", "last_viewed", "interviewing",
+    "invites_sent", "unanswered_invites"
+]
+
+
+class DetailCache:
+    def __init__(self, max_entries, ttl, disk_file=None, max_disk_entries=0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_disk_entries = max_disk_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.db = None
+        if disk_file:
+            # Workers share this file, so wait for each other's writes like the other shared databases
+            self.db = sqlite3.connect(disk_file, timeout=30, check_same_thread=False)
+            self.db.execute(f"PRAGMA journal_mode={shared_journal_mode()}")
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS details ("
+                "job_uid TEXT PRIMARY KEY, fetched_at REAL NOT NULL, fields TEXT NOT NULL) WITHOUT ROWID"
+            )
+            self.db.execute("CREATE INDEX IF NOT EXISTS details_fetched_at ON details (fetched_at)")
+            self.db.commit()
+
+    def get(self, job_uid, max_age=None):
+        max_age = self.ttl if max_age is None else max_age
+        now = time.time()
+        with self.lock:
+            entry = self.entries.get(job_uid)
+            from_disk = False
+            if entry is None and self.db is not None:
+                # The cache only saves fetches, so a locked or broken disk tier counts as a miss
+                try:
+                    row = self.db.execute(
+                        "SELECT fetched_at, fields FROM details WHERE job_uid = ?", (job_uid,)
+                    ).fetchone()
+                except sqlite3.Error as e:
+                    print(f"Error reading cached job details: {e}")
+                    row = None
+                if row and now - row[0] <= self.ttl:
+                    entry = (row[0], json.loads(row[1]))
+                    self._remember(job_uid, entry)
+                    from_disk = True
+
+            if entry is None or now - entry[0] > max_age:
+                self.misses += 1
+                return None
+
+            self.entries.move_to_end(job_uid)
+            self.hits += 1
+            if from_disk:
+                self.disk_hits += 1
+            return entry[1]
+
+    def put(self, job_uid, job_info):
+        fields = {field: job_info[field] for field in POSTING_FIELDS if field in job_info}
+        entry = (time.time(), fields)
+        with self.lock:
+            self._remember(job_uid, entry)
+            if self.db is not None:
+                try:
+                    with self.db:
+                        self.db.execute(
+                            "INSERT OR REPLACE INTO details (job_uid, fetched_at, fields) VALUES (?, ?, ?)",
+                            (job_uid, entry[0], json.dumps(fields))
+                        )
+                except sqlite3.Error as e:
+                    print(f"Error caching job details: {e}")
+
+    def _remember(self, job_uid, entry):
+        self.entries[job_uid] = entry
+        self.entries.move_to_end(job_uid)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def prune(self):
+        cutoff = time.time() - self.ttl
+        with self.lock:
+            for job_uid in [job_uid for job_uid, entry in self.entries.items() if entry[0] < cutoff]:
+                del self.entries[job_uid]
+            if self.db is not None:
+                try:
+                    with self.db:
+                        self.db.execute("DELETE FROM details WHERE fetched_at < ?", (cutoff,))
+                        # Keep only the newest entries once the disk tier is over its size limit
+                        self.db.execute(
+                            "DELETE FROM details WHERE job_uid NOT IN "
+                            "(SELECT job_uid FROM details ORDER BY fetched_at DESC LIMIT ?)",
+                            (self.max_disk_entries,)
+                        )
+                except sqlite3.Error as e:
+                    print(f"Error pruning cached job details: {e}")
+
+    def status(self):
+        lookups = self.hits + self.misses
+        hit_rate = self.hits / lookups if lookups else 0
+        return (f"Detail cache: {len(self.entries)} in memory, {self.hits} hits "
+                f"({self.disk_hits} from disk), {self.misses} misses, {hit_rate:.0%} hit rate")
+
+
+detail_cache = None
+_detail_cache_lock = threading.Lock()
+
+
+def get_detail_cache():
+    global detail_cache
+    with _detail_cache_lock:
+        if detail_cache is None:
+            detail_cache = DetailCache(
+                DETAIL_CACHE_MAX_ENTRIES, DETAIL_CACHE_TTL * 60,
+                DETAIL_CACHE_FILE, DETAIL_CACHE_MAX_DISK_ENTRIES
+            )
+        return detail_cache
+
+
+@timed("upwork_alerts_process_job_posting_seconds")
+def process_job_posting(job_info, max_age=None):
+    if not job_info or not job_info.get('url'):
+        return job_info
+    
+    job_uid = job_info.get('job_uid')
+    if job_uid:
+        cached = get_detail_cache().get(job_uid, max_age)
+        if cached is not None:
+            print(f"Using cached details for job posting: {job_info['title']}")
+            job_info.update(cached)
+            job_info["full_details_fetched"] = True
+            return job_info
+    
+    updated_info = fetch_job_posting(job_info)
+    if job_uid and updated_info.get("full_details_fetched"):
+        get_detail_cache().put(job_uid, updated_info)
+    return updated_info
+
+
+def fetch_job_posting(job_info):
     if not job_info or not job_info.get('url'):
         return job_info
     
     try:
         print(f"Processing job posting: {job_info['title']}")
         
-        job_html = get_html(job_info['url'], wait_selector='[data-test="JobDetailsVisitor"]')
+        if HTTP_FAST_PATH and page_fetcher is None:
+            job_html = fetch_posting_http(job_info)
+            if job_html:
+                if SAVE_POST_HTML:
+                    save_html(job_html, "job_html", job_info.get('job_uid', 'unknown'))
+                return job_info
+        
+        job_html = fetch_rendered_html(job_info['url'], "posting")
         
         if SAVE_POST_HTML and job_html:
             job_id = job_info.get('job_uid', 'unknown')
@@ -613,41 +2604,72 @@ def process_job_posting(job_info):
         return job_info
 
 
-def extract_jobs_from_search(html_content):
+def is_job_tile(name, attrs):
+    if attrs.get('data-test') == 'JobTile':
+        return True
+    classes = attrs.get('class') or ''
+    if isinstance(classes, str):
+        classes = classes.split()
+    return name == 'article' and 'job-tile' in classes
+
+
+# Only build the job tile subtrees of a search page, the rest of the document is never used
+_job_tile_strainer = None
+
+
+def get_job_tile_strainer():
+    global _job_tile_strainer
+    if _job_tile_strainer is None:
+        from bs4 import SoupStrainer
+        _job_tile_strainer = SoupStrainer(is_job_tile)
+    return _job_tile_strainer
+
+
+def parse_search_tiles(html_content):
     if not html_content:
         return []
+
+    parse_start = time.perf_counter()
+    soup = make_soup(html_content, parse_only=get_job_tile_strainer())
+    job_elements = soup.find_all(is_job_tile_element, recursive=False)
+    preferred = [tile for tile in job_elements if tile.name == 'article' and 'job-tile' in tile.get('class', [])
+                 and tile.get('data-test') == 'JobTile']
+    print(f"Parsed {len(job_elements)} job tiles in {(time.perf_counter() - parse_start) * 1000:.0f} ms")
+
+    if job_elements and not preferred:
+        print("Warning: No article.job-tile[data-test=\"JobTile\"] elements found. HTML structure may have changed.")
+    return preferred or job_elements
+
+
+def is_job_tile_element(tag):
+    return is_job_tile(tag.name, tag.attrs)
+
+
+def debug_job_tile(job_element):
+    print("\nSample job element structure:")
+    job_classes = job_element.get('class', [])
+    job_attrs = job_element.attrs
+    print(f"Classes: {job_classes}")
+    print(f"Attributes: {', '.join([f'{k}={repr(v)}' for k, v in job_attrs.items() if k != 'class'])}")
+
+    title_elem = title_selectors.select_one(job_element)
+    if title_elem:
+        print(f"Found title using selector '{title_selectors.selectors[title_selectors.last]}': {title_elem.get_text(strip=True)}")
+
+
+@timed("upwork_alerts_extract_jobs_seconds")
+def extract_jobs_from_search(html_content, job_elements=None):
+    if job_elements is None:
+        if not html_content:
+            return []
+        job_elements = parse_search_tiles(html_content)
         
     jobs = []
     try:
-        soup = BeautifulSoup(html_content, BS4_PARSER)
-        
-        job_elements = soup.select('article.job-tile[data-test="JobTile"]')
-        if not job_elements:
-            job_elements = soup.select('article[data-test="JobTile"], article.job-tile')
-        
         print(f"Found {len(job_elements)} job elements in search results")
         
-        # Debug the first job structure if available
-        if job_elements and len(job_elements) > 0:
-            print("\nSample job element structure:")
-            first_job = job_elements[0]
-            job_classes = first_job.get('class', [])
-            job_attrs = first_job.attrs
-            print(f"Classes: {job_classes}")
-            print(f"Attributes: {', '.join([f'{k}={repr(v)}' for k, v in job_attrs.items() if k != 'class'])}")
-            
-            potential_title_selectors = [
-                'h2.job-tile-title a', 
-                'h2.h5.job-tile-title a',
-                '[data-test="job-tile-title-link"]', 
-                '[data-test="job-tile-title"] a',
-                'a.air3-link'
-            ]
-            for selector in potential_title_selectors:
-                title_elem = first_job.select_one(selector)
-                if title_elem:
-                    print(f"Found title using selector '{selector}': {title_elem.get_text(strip=True)}")
-                    break
+        if DEBUG_TILES and job_elements:
+            debug_job_tile(job_elements[0])
         
         for job_element in job_elements:
             job_info = extract_job_info_from_search(job_element)
@@ -661,87 +2683,1055 @@ def extract_jobs_from_search(html_content):
         return []
 
 
-def process_search_page(search_url):
+def save_search_html(search_url, html_content):
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    search_id = search_url.split('?')[0].split('/')[-1] if '/' in search_url else 'search'
+    save_html(html_content, "search_html", f"{search_id}_{timestamp}")
+
+
+TILE_UID_PATTERN = re.compile(r'<article\b[^>]*?\bdata-ev-job-uid="([^"]+)"')
+
+
+def scan_tile_uids(html_content):
+    # Reads the job uid of every tile straight from the raw HTML, in page order, without building a DOM
+    return [(match.group(1), match.start()) for match in TILE_UID_PATTERN.finditer(html_content)]
+
+
+def find_new_job_uids(job_uids, is_seen):
+    # Every uid on the page is checked. Jobs already seen through another search, or alerted by another
+    # worker, can sit above a job that is new to this search, so no run of seen jobs ends the scan. The uids
+    # come from one regex pass and only the new tiles are parsed, so the whole page costs little
+    new_uids = [job_uid for job_uid in job_uids if not is_seen(job_uid)]
+    print(f"Incremental scan found {len(new_uids)} new of {len(job_uids)} jobs")
+    return new_uids
+
+
+class SearchFingerprints:
+    # A cheap hash of the ordered job uids of each search page. Most polls return exactly the page of
+    # the last poll, and those are skipped before any tile is parsed or history lookup is made
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.searches = {}
+
+    def _entry(self, search_url):
+        return self.searches.setdefault(search_url, {
+            "confirmed": None, "pending": None, "unchanged_polls": 0, "hits": 0, "checks": 0})
+
+    def check(self, search_url, job_uids):
+        fingerprint = hashlib.blake2b("\n".join(job_uids).encode(), digest_size=8).hexdigest()
+        with self.lock:
+            entry = self._entry(search_url)
+            entry["checks"] += 1
+            unchanged = fingerprint == entry["confirmed"]
+            if unchanged:
+                entry["hits"] += 1
+                entry["unchanged_polls"] += 1
+            else:
+                entry["pending"] = fingerprint
+                entry["unchanged_polls"] = 0
+            hit_ratio = entry["hits"] / entry["checks"]
+        metrics.inc("upwork_alerts_search_fingerprint_total", search=search_url, outcome="hit" if unchanged else "miss")
+        metrics.set("upwork_alerts_search_fingerprint_hit_ratio", hit_ratio, search=search_url)
+        return unchanged
+
+    def commit(self, search_url):
+        # Only trusted once every job on the page has been handed on, a page whose handling failed is looked at again
+        with self.lock:
+            entry = self._entry(search_url)
+            if entry["pending"] is not None:
+                entry["confirmed"], entry["pending"] = entry["pending"], None
+
+    def discard(self, search_url):
+        with self.lock:
+            self._entry(search_url)["pending"] = None
+
+    def unchanged_polls(self, search_url):
+        with self.lock:
+            return self.searches.get(search_url, {}).get("unchanged_polls", 0)
+
+    def summary(self):
+        with self.lock:
+            lines = [f"  {entry['hits']}/{entry['checks']} unchanged ({entry['hits'] / entry['checks']:.0%}), "
+                     f"{entry['unchanged_polls']} in a row: {url}"
+                     for url, entry in self.searches.items() if entry["checks"]]
+        if not lines:
+            return "Search fingerprints: no pages checked yet"
+        return "Search fingerprints:\n" + "\n".join(lines)
+
+
+search_fingerprints = SearchFingerprints()
+
+
+def page_unchanged(search_url, job_uids):
+    if not (SEARCH_FINGERPRINTS and job_uids):
+        return False
+    if not search_fingerprints.check(search_url, job_uids):
+        return False
+    print(f"Search page has the same {len(job_uids)} jobs as the last poll, skipping it")
+    return True
+
+
+def extract_new_jobs_from_search(search_url, html_content, is_seen, tile_uids=None):
+    if tile_uids is None:
+        tile_uids = scan_tile_uids(html_content)
+    if not tile_uids:
+        return None
+    metrics.inc("upwork_alerts_tiles_seen_total", len(tile_uids), search=search_url)
+
+    new_uids = set(find_new_job_uids([job_uid for job_uid, _ in tile_uids], is_seen))
+    if not new_uids:
+        return []
+
+    # Only parse the slice of the page from the first to the last new tile
+    new_indexes = [index for index, (job_uid, _) in enumerate(tile_uids) if job_uid in new_uids]
+    start = tile_uids[new_indexes[0]][1]
+    end = tile_uids[new_indexes[-1] + 1][1] if new_indexes[-1] + 1 < len(tile_uids) else len(html_content)
+    job_elements = [tile for tile in parse_search_tiles(html_content[start:end])
+                    if tile.get('data-ev-job-uid') in new_uids]
+    jobs = extract_jobs_from_search(html_content, job_elements)
+    if len(jobs) < len(new_uids):
+        # Some new tiles couldn't be read, so the next poll of this page must not be skipped
+        search_fingerprints.discard(search_url)
+    return jobs
+
+
+@timed("upwork_alerts_process_search_page_seconds", lambda search_url, *args: {"search": search_url})
+def process_search_page(search_url, is_seen=None):
+    # Returns None when the page couldn't be fetched or read, so a failed poll isn't mistaken for a quiet one
+    incremental = INCREMENTAL_SCAN and is_seen is not None
     try:
-        html_content = get_html(search_url, wait_selector='article.job-tile[data-test="JobTile"]')
+        if HTTP_FAST_PATH and page_fetcher is None:
+            jobs, html_content = fetch_search_jobs_http(search_url, check_unchanged=incremental)
+            if jobs is not None:
+                metrics.inc("upwork_alerts_search_polls_total", search=search_url, outcome="success")
+                metrics.inc("upwork_alerts_tiles_seen_total", len(jobs), search=search_url)
+                if SAVE_SEARCH_HTML:
+                    save_search_html(search_url, html_content)
+                if incremental and jobs:
+                    new_uids = set(find_new_job_uids([job['job_uid'] for job in jobs], is_seen))
+                    jobs = [job for job in jobs if job['job_uid'] in new_uids]
+                return jobs
+        
+        html_content = fetch_rendered_html(search_url, "search")
         
         if not html_content:
             print("Failed to fetch search page HTML")
-            return []
+            metrics.inc("upwork_alerts_search_polls_total", search=search_url, outcome="error")
+            return None
+        metrics.inc("upwork_alerts_search_polls_total", search=search_url, outcome="success")
             
         if SAVE_SEARCH_HTML:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            search_id = search_url.split('?')[0].split('/')[-1] if '/' in search_url else 'search'
-            save_html(html_content, "search_html", f"{search_id}_{timestamp}")
+            save_search_html(search_url, html_content)
         
-        soup = BeautifulSoup(html_content, BS4_PARSER)
-        job_elements = soup.select('article.job-tile[data-test="JobTile"]')
-        if not job_elements:
-            print("Warning: No job elements found in search results. HTML structure may have changed.")
-            print("Trying alternative selectors...")
-            job_elements = soup.select('article.job-tile, [data-test="JobTile"]')
+        if incremental:
+            tile_uids = scan_tile_uids(html_content)
+            if page_unchanged(search_url, [job_uid for job_uid, _ in tile_uids]):
+                return []
+            jobs = extract_new_jobs_from_search(search_url, html_content, is_seen, tile_uids)
+            if jobs is not None:
+                return jobs
+            print("No job uids found in raw HTML, extracting every tile")
+        
+        job_elements = parse_search_tiles(html_content)
+        metrics.inc("upwork_alerts_tiles_seen_total", len(job_elements), search=search_url)
             
         if not job_elements:
-            print("Still no job elements found. Saving sample HTML for debugging...")
-            debug_path = f"./debug/search_html/debug_empty_search_{datetime.now().strftime('%Y%m%d_%H%M%S')}.html"
-            with open(debug_path, 'w', encoding='utf-8') as f:
-                f.write(html_content)
-            print(f"Saved debug snippet to {debug_path}")
+            print("No job elements found. Saving sample HTML for debugging...")
+            # Kept whole, scripts included, since the page may not be the one we expected
+            save_html(html_content, "search_html", "debug_empty_search", strip_scripts=False)
             
-        return extract_jobs_from_search(html_content)
+        return extract_jobs_from_search(html_content, job_elements)
     except Exception as e:
         print(f"Error processing search page: {e}")
-        return []
+        metrics.inc("upwork_alerts_search_polls_total", search=search_url, outcome="error")
+        search_fingerprints.discard(search_url)
+        return None
+
+# ---------------------------
+# Catch-up Crawl
+# ---------------------------
+
+def search_page_url(search_url, page):
+    parts = urlparse(search_url)
+    query = parse_qs(parts.query, keep_blank_values=True)
+    query['page'] = [str(page)]
+    return parts._replace(query=urlencode(query, doseq=True)).geturl()
+
+
+def needs_catch_up(search_url, jobs, last_polled, polled_at, is_seen):
+    # Only worth a look at page two when the search went unwatched for a while and page one is new jobs all the way down
+    if last_polled is None or polled_at - last_polled < CATCH_UP_AFTER * 60:
+        return False
+    return len(jobs) >= expected_ready_count("search", search_url) and not any(is_seen(job['job_uid']) for job in jobs)
+
+
+def catch_up_stop_reason(jobs, per_page, is_seen, last_polled):
+    if len(jobs) < per_page:
+        return "last page of results"
+    if all(is_seen(job['job_uid']) for job in jobs):
+        return "every job already seen"
+    # A job shown as posted "2 hours ago" is at least that old, so this never stops before the gap is covered
+    now = time.time()
+    posted = [parse_posted_at(job.get('posted_time'), now) for job in jobs]
+    if all(posted_at is not None and posted_at < last_polled for posted_at in posted):
+        return "every job posted before the last poll"
+    return None
+
+
+def catch_up_search(search_url, last_polled, is_seen):
+    print(f"Search was last polled {(time.time() - last_polled) / 60:.0f} minutes ago, catching up on further result pages")
+    per_page = expected_ready_count("search", search_url)
+    new_jobs = []
+    fetched = 0
+    page = 2
+    stop_reason = f"reached page {CATCH_UP_MAX_PAGES}"
+
+    # Pages are fetched a few at a time and read in order, so the crawl ends at the first page that reaches known jobs
+    with ThreadPoolExecutor(max_workers=CATCH_UP_WORKERS, thread_name_prefix="catch-up") as pool:
+        while page <= CATCH_UP_MAX_PAGES and stop_reason.startswith("reached"):
+            pages = list(range(page, min(page + CATCH_UP_WORKERS, CATCH_UP_MAX_PAGES + 1)))
+            results = pool.map(lambda number: process_search_page(search_page_url(search_url, number)), pages)
+            for number, jobs in zip(pages, results):
+                fetched += 1
+                if jobs is None:
+                    stop_reason = f"page {number} failed"
+                    break
+                for index, job in enumerate(jobs):
+                    if job.get('job_uid') and not is_seen(job['job_uid']):
+                        job["catch_up_rank"] = (number, index)
+                        new_jobs.append(job)
+                reason = catch_up_stop_reason(jobs, per_page, is_seen, last_polled)
+                if reason:
+                    stop_reason = f"{reason} on page {number}"
+                    break
+            page += len(pages)
+
+    metrics.inc("upwork_alerts_catch_up_pages_total", fetched, search=search_url)
+    print(f"Catch-up fetched {fetched} more pages and found {len(new_jobs)} more new jobs, stopped: {stop_reason}")
+    return new_jobs
+
+
+# ---------------------------
+# Job Filters
+# ---------------------------
+
+MONEY_PATTERN = re.compile(r'\$?\s*([\d,]+(?:\.\d+)?)\s*([KkMm])?')
+MONEY_SUFFIXES = {"k": 1000, "m": 1000000}
+
+filter_stats = Counter()
+_filter_stats_lock = threading.Lock()
+
+
+def parse_money_values(text):
+    # "$10.00 - $20.00 per hour" -> [10.0, 20.0], "$1.5K" -> [1500.0]
+    values = []
+    for number, suffix in MONEY_PATTERN.findall(text or ""):
+        try:
+            value = float(number.replace(",", ""))
+        except ValueError:
+            continue
+        values.append(value * MONEY_SUFFIXES.get(suffix.lower(), 1))
+    return values
+
+
+def parse_count(text):
+    # Lower bound of Upwork's count labels: "Less than 5" -> 0, "20 to 50" -> 20, "50+" -> 50
+    text = text or ""
+    if text.lower().startswith("less than"):
+        return 0
+    match = re.search(r'\d+', text.replace(",", ""))
+    return int(match.group()) if match else None
+
+
+def keyword_pattern(keywords):
+    return re.compile(r'\b(?:' + "|".join(re.escape(keyword) for keyword in keywords) + r')\b', re.I)
+
+
+def job_text(job):
+    return f"{job.get('title') or ''}\n{job.get('description') or ''}"
+
+
+def job_skills(job):
+    return {skill.lower() for skill in job.get("skills") or []}
+
+
+def compile_tile_rule(name, value):
+    # Each rule becomes a predicate that returns False for a job to skip; missing data never rejects a job
+    if name in ("min_budget", "max_budget"):
+        def check(job):
+            if job.get("job_type") != "Fixed":
+                return True
+            amounts = parse_money_values(job.get("budget"))
+            if not amounts:
+                return True
+            return amounts[0] >= value if name == "min_budget" else amounts[0] <= value
+        return check
+    if name in ("min_hourly_rate", "max_hourly_rate"):
+        def check(job):
+            if job.get("job_type") != "Hourly":
+                return True
+            rates = parse_money_values(job.get("budget"))
+            if not rates:
+                return True
+            # Compare against the best end of the client's range
+            return max(rates) >= value if name == "min_hourly_rate" else min(rates) <= value
+        return check
+    if name == "job_types":
+        allowed = {job_type.lower() for job_type in value}
+        return lambda job: not job.get("job_type") or job["job_type"].lower() in allowed
+    if name == "experience_levels":
+        allowed = {level.lower() for level in value}
+        return lambda job: job.get("experience_level") in (None, "", "Not specified") or job["experience_level"].lower() in allowed
+    if name == "required_skills":
+        required = {skill.lower() for skill in value}
+        return lambda job: required <= job_skills(job)
+    if name == "any_skills":
+        wanted = {skill.lower() for skill in value}
+        return lambda job: bool(wanted & job_skills(job))
+    if name == "excluded_skills":
+        excluded = {skill.lower() for skill in value}
+        return lambda job: not excluded & job_skills(job)
+    if name == "include_keywords":
+        pattern = keyword_pattern(value)
+        return lambda job: pattern.search(job_text(job)) is not None
+    if name == "exclude_keywords":
+        pattern = keyword_pattern(value)
+        return lambda job: pattern.search(job_text(job)) is None
+    raise ValueError(f"Unknown filter rule '{name}'")
+
+
+def compile_posting_rule(name, value):
+    if name in ("min_client_spend", "max_client_spend"):
+        def check(job):
+            amounts = parse_money_values(job.get("client_spend"))
+            if not amounts:
+                return True
+            return amounts[0] >= value if name == "min_client_spend" else amounts[0] <= value
+        return check
+    if name in ("min_client_hires", "max_proposals", "max_interviewing"):
+        field = {"min_client_hires": "client_hires", "max_proposals": "proposals", "max_interviewing": "interviewing"}[name]
+
+        def check(job):
+            count = parse_count(job.get(field))
+            if count is None:
+                return True
+            return count >= value if name.startswith("min_") else count <= value
+        return check
+    # Tile rules also work on the posting, where the description is complete
+    return compile_tile_rule(name, value)
+
+
+class JobFilter:
+    def __init__(self, rules):
+        rules = dict(rules or {})
+        posting_rules = rules.pop("posting", {}) or {}
+        self.tile_rules = [(name, compile_tile_rule(name, value)) for name, value in rules.items()]
+        self.posting_rules = [(name, compile_posting_rule(name, value)) for name, value in posting_rules.items()]
+
+    def rejects(self, job, stage):
+        # Name of the first rule the job fails, or None when it passes
+        rules = self.tile_rules if stage == "tile" else self.posting_rules
+        for name, check in rules:
+            if not check(job):
+                return name
+        return None
+
+
+job_filter = None
+_job_filter_lock = threading.Lock()
+
+
+def get_job_filter():
+    global job_filter
+    with _job_filter_lock:
+        if job_filter is None:
+            job_filter = JobFilter(FILTER_RULES)
+            if job_filter.tile_rules or job_filter.posting_rules:
+                print(f"Filtering jobs with {len(job_filter.tile_rules)} tile rules and "
+                      f"{len(job_filter.posting_rules)} posting rules")
+        return job_filter
+
+
+def record_filtered(stage, rule):
+    with _filter_stats_lock:
+        filter_stats[(stage, rule)] += 1
+    metrics.inc("upwork_alerts_jobs_filtered_total", stage=stage, rule=rule)
+
+
+def filter_summary():
+    with _filter_stats_lock:
+        stats = dict(filter_stats)
+    if not stats:
+        return "Filters - nothing filtered yet"
+    tile = sum(count for (stage, _), count in stats.items() if stage == "tile")
+    posting = sum(count for (stage, _), count in stats.items() if stage == "posting")
+    rules = ", ".join(f"{rule} {count}" for (_, rule), count in sorted(stats.items(), key=lambda item: -item[1]))
+    return f"Filters - saved {tile} posting fetches and {tile + posting} alerts ({rules})"
+
+
+# ---------------------------
+# Job Records
+# ---------------------------
+
+RELATIVE_TIME_PATTERN = re.compile(r'(\d+|an?)\s+(second|minute|hour|day|week|month)s?\s+ago', re.I)
+RELATIVE_TIME_UNITS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400, "week": 604800, "month": 2592000}
+
+
+def parse_posted_at(text, seen_at):
+    # Upwork shows how long ago a job was posted; turn that into a timestamp using when we saw it
+    text = (text or "").strip().lower()
+    if text in ("just now", "now"):
+        return seen_at
+    if text == "yesterday":
+        return seen_at - 86400
+    match = RELATIVE_TIME_PATTERN.search(text)
+    if not match:
+        return None
+    count = 1 if match.group(1) in ("a", "an") else int(match.group(1))
+    return seen_at - count * RELATIVE_TIME_UNITS[match.group(2)]
+
+
+def parse_count_range(text):
+    # "Less than 5" -> (0, 4), "20 to 50" -> (20, 50), "50+" -> (50, None), "37" -> (37, 37)
+    text = (text or "").replace(",", "")
+    numbers = [int(number) for number in re.findall(r'\d+', text)]
+    if not numbers:
+        return None, None
+    if text.lower().startswith("less than"):
+        return 0, numbers[0] - 1
+    if text.rstrip().endswith("+"):
+        return numbers[0], None
+    return numbers[0], numbers[1] if len(numbers) > 1 else numbers[0]
+
+
+class JobRecord:
+    # Fixed attributes instead of a per-job dict, with display strings turned into numbers for analysis
+    __slots__ = (
+        "job_uid", "title", "url", "search_url", "first_seen", "posted_at", "job_type", "budget_min", "budget_max",
+        "experience_level", "duration", "skills", "description", "client_country", "client_spend", "client_hires",
+        "proposals_min", "proposals_max", "interviewing", "invites_sent", "full_details", "outcome", "filter_rule",
+    )
+
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            setattr(self, name, fields.get(name))
+
+    @classmethod
+    def from_job(cls, job, outcome, filter_rule=None):
+        seen_at = job.get("discovered_at") or time.time()
+        job_type = (job.get("job_type") or "").lower() or None
+        amounts = parse_money_values(job.get("budget"))
+        spend = parse_money_values(job.get("client_spend"))
+        proposals_min, proposals_max = parse_count_range(job.get("proposals"))
+        location = job.get("client_location") or ""
+        return cls(
+            job_uid=job.get("job_uid"),
+            title=job.get("title"),
+            url=job.get("url"),
+            search_url=job.get("search_url"),
+            first_seen=seen_at,
+            posted_at=parse_posted_at(job.get("posted_time"), seen_at),
+            job_type=job_type,
+            budget_min=min(amounts) if amounts else None,
+            budget_max=max(amounts) if amounts else None,
+            experience_level=job.get("experience_level"),
+            duration=job.get("duration"),
+            skills=tuple(job.get("skills") or ()),
+            description=job.get("description"),
+            client_country=location.split(" (")[0] or None,
+            client_spend=spend[0] if spend else None,
+            client_hires=parse_count(job.get("client_hires")),
+            proposals_min=proposals_min,
+            proposals_max=proposals_max,
+            interviewing=parse_count(job.get("interviewing")),
+            invites_sent=parse_count(job.get("invites_sent")),
+            full_details=bool(job.get("full_details_fetched")),
+            outcome=outcome,
+            filter_rule=filter_rule,
+        )
+
+    def as_row(self):
+        return tuple(json.dumps(list(self.skills)) if name == "skills" else getattr(self, name)
+                     for name in self.__slots__)
+
+
+ARCHIVE_COLUMN_TYPES = {
+    "first_seen": "REAL", "posted_at": "REAL", "budget_min": "REAL", "budget_max": "REAL", "client_spend": "REAL",
+    "client_hires": "INTEGER", "proposals_min": "INTEGER", "proposals_max": "INTEGER", "interviewing": "INTEGER",
+    "invites_sent": "INTEGER", "full_details": "INTEGER",
+}
+
+
+class JobArchive:
+    def __init__(self, path):
+        self.db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.db.execute(f"PRAGMA journal_mode={shared_journal_mode()}")
+        columns = ", ".join(f"{name} {ARCHIVE_COLUMN_TYPES.get(name, 'TEXT')}" for name in JobRecord.__slots__)
+        self.db.execute(f"CREATE TABLE IF NOT EXISTS jobs ({columns})")
+        self.db.execute("CREATE INDEX IF NOT EXISTS jobs_first_seen ON jobs (first_seen)")
+        self.db.commit()
+        self.insert = (f"INSERT INTO jobs ({', '.join(JobRecord.__slots__)}) "
+                       f"VALUES ({', '.join('?' for _ in JobRecord.__slots__)})")
+        self.queue = queue.Queue()
+        self.archived = 0
+        self.thread = threading.Thread(target=self._run, name="job-archive", daemon=True)
+        self.thread.start()
+
+    def append(self, record):
+        self.queue.put(record)
+
+    def _write(self, batch):
+        try:
+            with self.db:
+                self.db.executemany(self.insert, [record.as_row() for record in batch])
+            self.archived += len(batch)
+            metrics.inc("upwork_alerts_jobs_archived_total", len(batch))
+        except sqlite3.Error as e:
+            print(f"Error archiving {len(batch)} jobs: {e}")
+
+    def _run(self):
+        batch = []
+        deadline = None
+        stopping = False
+        while not stopping:
+            timeout = None if deadline is None else max(0, deadline - time.monotonic())
+            try:
+                record = self.queue.get(timeout=timeout)
+            except queue.Empty:
+                record = None
+            if record is _STOP:
+                stopping = True
+            elif record is not None:
+                batch.append(record)
+                if deadline is None:
+                    deadline = time.monotonic() + JOB_ARCHIVE_FLUSH_INTERVAL
+            # Written as one transaction per batch, once it is full or has waited long enough
+            if batch and (stopping or len(batch) >= JOB_ARCHIVE_BATCH_SIZE or time.monotonic() >= deadline):
+                self._write(batch)
+                batch = []
+                deadline = None
+
+    def close(self):
+        self.queue.put(_STOP)
+        self.thread.join(timeout=30)
+        self.db.close()
+
+
+job_archive = None
+_job_archive_lock = threading.Lock()
+
+
+def get_job_archive():
+    global job_archive
+    with _job_archive_lock:
+        if job_archive is None and JOB_ARCHIVE_FILE:
+            job_archive = JobArchive(JOB_ARCHIVE_FILE)
+        return job_archive
+
+
+def archive_job(job, outcome, filter_rule=None):
+    archive = get_job_archive()
+    if archive is None:
+        return
+    try:
+        archive.append(JobRecord.from_job(job, outcome, filter_rule))
+    except Exception as e:
+        print(f"Error archiving job {job.get('job_uid')}: {e}")
+
+
+def close_job_archive():
+    global job_archive
+    with _job_archive_lock:
+        if job_archive is not None:
+            job_archive.close()
+            job_archive = None
+
+
+# ---------------------------
+# Check Pipeline
+# ---------------------------
+
+_STOP = object()
+
+
+def run_stage(name, workers, inbox, handler):
+    def worker():
+        while True:
+            item = inbox.get()
+            if item is _STOP:
+                break
+            try:
+                handler(item)
+            except Exception as e:
+                print(f"Error in {name} stage: {e}")
+
+    threads = [threading.Thread(target=worker, name=f"{name}-{i}", daemon=True) for i in range(max(1, workers))]
+    for thread in threads:
+        thread.start()
+
+    def finish():
+        for _ in threads:
+            inbox.put(_STOP)
+        for thread in threads:
+            thread.join()
+
+    return finish
+
+
+def run_check(job_history, search_urls=None, worker_id=None):
+    print("-------------------------------------------")
+    print(f"Starting search at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print("-------------------------------------------")
+
+    cycle_start = time.time()
+    job_filter = get_job_filter()
+    history_lock = threading.Lock()
+    in_flight = {}
+    merged_sightings = []
+    held_for_merge = []
+    searches_done = False
+    alert_latencies = []
+    catch_up_backlog = []
+    search_urls = SEARCH_URLS if search_urls is None else search_urls
+    new_jobs_by_url = {url: 0 for url in search_urls}
+
+    search_queue = queue.Queue()
+    detail_queue = queue.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+    notify_queue = queue.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+
+    # Jobs found earlier in this check are not "seen" here, so a second search that finds one
+    # still reports it and gets listed on the shared alert
+    def is_seen(job_uid):
+        return job_uid in job_history
+
+    def handle_search(url):
+        print(f"Processing search URL: {url}")
+        polled_at = time.time()
+        last_polled = job_history.last_polled(url)
+        jobs = process_search_page(url, is_seen)
+        if jobs is None:
+            jobs = []
+            polled_at = None
+        elif needs_catch_up(url, jobs, last_polled, polled_at, is_seen):
+            # Jobs posted while we weren't watching may have scrolled past page one
+            for index, job in enumerate(jobs):
+                job["catch_up_rank"] = (1, index)
+            jobs += catch_up_search(url, last_polled, is_seen)
+        claimed_elsewhere = False
+
+        for job in jobs:
+            job_uid = job.get('job_uid')
+            if not job_uid:
+                continue
+
+            with history_lock:
+                if job_uid in in_flight:
+                    # Already being handled for another search, just add this search to its alert
+                    in_flight[job_uid]["matched_searches"].append(url)
+                    merged_sightings.append(job_uid)
+                    is_new = False
+                elif job_uid in job_history:
+                    is_new = False
+                elif worker_id and not job_history.claim(job_uid, worker_id):
+                    # Another worker's search found it first and alerts it
+                    claimed_elsewhere = True
+                    is_new = False
+                else:
+                    job["matched_searches"] = [url]
+                    in_flight[job_uid] = job
+                    is_new = True
+
+            if is_new:
+                print(f"Found new job: {job['title']}")
+                job["discovered_at"] = time.time()
+                job["search_url"] = url
+                new_jobs_by_url[url] += 1
+                metrics.inc("upwork_alerts_jobs_new_total", search=url)
+                rule = job_filter.rejects(job, "tile")
+                if rule:
+                    skip_job(job, "tile", rule)
+                    continue
+                # A catch-up backlog is sent in posting order at the end of the check, not tile by tile
+                if PROGRESSIVE_ALERTS and "catch_up_rank" not in job:
+                    send_tile_alert(job)
+                detail_queue.put(job)
+            else:
+                print(f"Skipping job already seen, found by another search or claimed by another worker: {job['title']}")
+
+        # Every job on the page is now handled here or already alerted, so the next poll may skip this exact page.
+        # A job claimed by another worker is left out, its claim may run out and need taking over
+        if not claimed_elsewhere:
+            search_fingerprints.commit(url)
+        if polled_at is not None:
+            job_history.record_poll(url, polled_at)
+
+        # Small delay between processing different search URLs
+        time.sleep(random.uniform(.2, .9))
+
+    def handle_detail(job):
+        job = process_job_posting(job)
+        rule = job_filter.rejects(job, "posting") if job.get("full_details_fetched") else None
+        if rule:
+            skip_job(job, "posting", rule)
+        else:
+            notify_queue.put(job)
+
+    def skip_job(job, stage, rule):
+        # Remembered like an alerted job, so it is filtered once and never fetched again
+        print(f"Filtered out '{job['title']}' at the {stage} stage by {rule}")
+        record_filtered(stage, rule)
+        archive_job(job, "filtered", rule)
+        if job.get("tile_message"):
+            # Its progressive alert already went out from the tile, take it back
+            delete_telegram_message(job["job_uid"])
+        job_history.add(job["job_uid"], job.get("search_url"))
+        with history_lock:
+            in_flight.pop(job["job_uid"], None)
+
+    def handle_notify(job):
+        # Hold alerts until every search of this check has reported, so each lists all matching searches
+        with history_lock:
+            if "catch_up_rank" in job:
+                catch_up_backlog.append(job)
+                return
+            if MERGE_ALERTS_ACROSS_SEARCHES and not searches_done:
+                held_for_merge.append(job)
+                return
+        send_alert(job)
+
+    def send_tile_alert(job):
+        # Progressive mode: alert from the tile straight away, the posting details are edited in later
+        try:
+            job["tile_message"] = create_telegram_message(job)
+            send_telegram_message(job["tile_message"], job["discovered_at"], job["job_uid"])
+        finally:
+            latency = time.time() - job["discovered_at"]
+            job_history.add(job["job_uid"], job.get("search_url"))
+            with history_lock:
+                alert_latencies.append(latency)
+            print(f"Alert for '{job['title']}' queued from its search tile {latency:.1f}s after discovery")
+
+    def send_alert(job):
+        if job.get("tile_message"):
+            try:
+                message = create_telegram_message(job)
+                # Nothing to edit when the posting fetch failed and no other search found the job
+                if message != job["tile_message"]:
+                    update_telegram_message(job["job_uid"], message)
+            finally:
+                archive_job(job, "alerted")
+                with history_lock:
+                    in_flight.pop(job["job_uid"], None)
+            return
+
+        try:
+            message = create_telegram_message(job)
+            send_telegram_message(message, job["discovered_at"])
+        finally:
+            latency = time.time() - job["discovered_at"]
+            # Recorded right away so a crash later in the check can't cause a repeat alert
+            job_history.add(job["job_uid"], job.get("search_url"))
+            archive_job(job, "alerted")
+            with history_lock:
+                in_flight.pop(job["job_uid"], None)
+                alert_latencies.append(latency)
+            print(f"Alert for '{job['title']}' queued {latency:.1f}s after discovery")
+
+    finish_notify = run_stage("notify", NOTIFY_WORKERS, notify_queue, handle_notify)
+    finish_detail = run_stage("detail", DETAIL_WORKERS, detail_queue, handle_detail)
+    finish_search = run_stage("search", SEARCH_WORKERS, search_queue, handle_search)
+
+    for url in search_urls:
+        search_queue.put(url)
+
+    # Drain each stage in order so nothing is left behind in a queue
+    finish_search()
+    with history_lock:
+        searches_done = True
+        held, held_for_merge[:] = list(held_for_merge), []
+    for job in held:
+        notify_queue.put(job)
+    finish_detail()
+    finish_notify()
+
+    if catch_up_backlog:
+        # Oldest first, so the chat reads in posting order; the Telegram sender's rate limit paces the backlog
+        print(f"Sending {len(catch_up_backlog)} alerts from catch-up crawls, oldest first")
+        for job in sorted(catch_up_backlog, key=lambda job: job["catch_up_rank"], reverse=True):
+            try:
+                send_alert(job)
+            except Exception as e:
+                print(f"Error in catch-up stage: {e}")
+
+    if merged_sightings:
+        print(f"Merged {len(merged_sightings)} jobs found by more than one search, saving a posting fetch and alert for each")
+
+    print(f"Check finished in {time.time() - cycle_start:.1f}s")
+    if alert_latencies:
+        print(f"Queued {len(alert_latencies)} alerts, slowest {max(alert_latencies):.1f}s after discovery")
+        print(f"Job history updated, now tracking {len(job_history)} jobs")
+    job_history.evict_older_than(JOB_HISTORY_MAX_AGE_DAYS)
+    return new_jobs_by_url
+
+
+# ---------------------------
+# Worker Coordination
+# ---------------------------
+
+def default_worker_id():
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+def worker_outbox_file(worker_id):
+    # Each worker delivers its own alerts, so a restarted worker with the same id picks up what it left unsent
+    base, ext = os.path.splitext(TELEGRAM_OUTBOX_FILE)
+    return f"{base}.{re.sub(r'[^A-Za-z0-9_.-]', '_', worker_id)}{ext}"
+
+
+def rendezvous_owner(url, workers):
+    # Highest random weight hashing: when a worker leaves or joins, only the searches it owned move
+    return max(workers, key=lambda worker: hashlib.sha1(f"{worker}|{url}".encode("utf-8")).digest())
+
+
+class Coordinator:
+    def __init__(self, path, worker_id):
+        self.worker_id = worker_id
+        self.db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.shard_workers = None
+        with self.lock:
+            self.db.execute(f"PRAGMA journal_mode={shared_journal_mode()}")
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS workers ("
+                "worker_id TEXT PRIMARY KEY, host TEXT, pid INTEGER, started REAL NOT NULL, heartbeat REAL NOT NULL)"
+            )
+            self.db.commit()
+
+    def heartbeat(self):
+        now = time.time()
+        with self.lock:
+            self.db.execute(
+                "INSERT INTO workers (worker_id, host, pid, started, heartbeat) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(worker_id) DO UPDATE SET host = excluded.host, pid = excluded.pid, "
+                "heartbeat = excluded.heartbeat",
+                (self.worker_id, socket.gethostname(), os.getpid(), now, now)
+            )
+            self.db.commit()
+
+    def _run(self):
+        while not self.stop_event.wait(WORKER_HEARTBEAT_INTERVAL):
+            try:
+                self.heartbeat()
+            except sqlite3.Error as e:
+                print(f"Worker heartbeat failed: {e}")
+
+    def start(self):
+        self.heartbeat()
+        self.thread = threading.Thread(target=self._run, name="worker-heartbeat", daemon=True)
+        self.thread.start()
+
+    def live_workers(self):
+        cutoff = time.time() - WORKER_LEASE_TIMEOUT
+        with self.lock:
+            rows = self.db.execute("SELECT worker_id FROM workers WHERE heartbeat >= ?", (cutoff,)).fetchall()
+        workers = {row[0] for row in rows}
+        workers.add(self.worker_id)
+        return sorted(workers)
+
+    def shard(self, search_urls):
+        workers = self.live_workers()
+        owned = [url for url in search_urls if rendezvous_owner(url, workers) == self.worker_id]
+        if workers != self.shard_workers:
+            self.shard_workers = workers
+            print(f"Worker {self.worker_id} polls {len(owned)} of {len(search_urls)} searches "
+                  f"({len(workers)} live workers: {', '.join(workers)})")
+        return owned
+
+    def close(self):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join(timeout=5)
+        # Leave right away so the other workers take over these searches without waiting for the lease to run out
+        with self.lock:
+            self.db.execute("DELETE FROM workers WHERE worker_id = ?", (self.worker_id,))
+            self.db.commit()
+            self.db.close()
+
+
+# ---------------------------
+# Polling Schedule
+# ---------------------------
+
+class SearchSchedule:
+    def __init__(self, url):
+        self.url = url
+        self.base_interval = CHECK_INTERVAL * 60  # What the search's own job rate asks for
+        self.interval = self.base_interval  # After stretching to fit FETCHES_PER_HOUR_BUDGET
+        self.jitter = 1.0
+        self.next_due = 0
+        self.last_polled = None
+        self.arrival_rate = None  # New jobs per second, smoothed across polls
+
+
+class SearchScheduler:
+    def __init__(self, search_urls):
+        self.searches = {url: SearchSchedule(url) for url in search_urls}
+        self.budget = FETCHES_PER_HOUR_BUDGET
+
+    def assign(self, search_urls):
+        # Worker mode: keep what's been learned about searches we still own, poll newly taken over ones right away
+        self.searches = {url: self.searches.get(url) or SearchSchedule(url) for url in search_urls}
+
+    def due_urls(self):
+        now = time.time()
+        return [search.url for search in self.searches.values() if search.next_due <= now]
+
+    def seconds_until_next(self):
+        if not self.searches:
+            return CHECK_INTERVAL * 60
+        return max(0, min(search.next_due for search in self.searches.values()) - time.time())
+
+    def record_poll(self, url, new_jobs, unchanged_polls=0):
+        search = self.searches[url]
+        now = time.time()
+        if ADAPTIVE_POLLING and search.last_polled is not None:
+            observed = new_jobs / max(1, now - search.last_polled)
+            if search.arrival_rate is None:
+                search.arrival_rate = observed
+            else:
+                search.arrival_rate = ARRIVAL_RATE_SMOOTHING * observed + (1 - ARRIVAL_RATE_SMOOTHING) * search.arrival_rate
+            previous_interval = search.base_interval
+            search.base_interval = self._interval_for(search)
+            if unchanged_polls >= UNCHANGED_BACKOFF_AFTER:
+                # The page hasn't moved at all, not even seen jobs, so back off even while the smoothed rate lingers
+                search.base_interval = min(MAX_POLL_INTERVAL * 60,
+                                           max(search.base_interval, previous_interval * UNCHANGED_BACKOFF_FACTOR))
+        search.last_polled = now
+
+    def _interval_for(self, search):
+        # Poll often enough to catch about POLL_TARGET_NEW_JOBS per poll; quiet searches back off gradually
+        if search.arrival_rate:
+            interval = POLL_TARGET_NEW_JOBS / search.arrival_rate
+        else:
+            interval = search.base_interval * 1.5
+        return min(MAX_POLL_INTERVAL * 60, max(MIN_POLL_INTERVAL * 60, interval))
+
+    def _apply_budget(self):
+        # Worked out from the unstretched intervals every time, so the stretch never compounds. Searches that
+        # weren't polled this check are moved too, or a changed stretch would only reach them one poll later
+        fetches_per_hour = sum(3600 / search.base_interval for search in self.searches.values())
+        scale = max(1.0, fetches_per_hour / self.budget)
+        for search in self.searches.values():
+            interval = search.base_interval * scale
+            if interval != search.interval and search.last_polled is not None:
+                search.next_due = search.last_polled + interval * search.jitter
+            search.interval = interval
+
+    def schedule(self, urls):
+        now = time.time()
+        for url in urls:
+            search = self.searches[url]
+            search.jitter = random.uniform(0.8, 1.2)
+            search.next_due = now + search.interval * search.jitter
+        if ADAPTIVE_POLLING:
+            self._apply_budget()
+
+    def describe(self):
+        lines = []
+        for search in sorted(self.searches.values(), key=lambda search: search.next_due):
+            rate = f"{search.arrival_rate * 3600:.1f} jobs/h" if search.arrival_rate is not None else "no rate yet"
+            next_time = datetime.fromtimestamp(search.next_due).strftime('%H:%M:%S')
+            lines.append(f"  every {search.interval / 60:.1f} min ({rate}), next at {next_time}: {search.url}")
+        return "Search schedule:\n" + "\n".join(lines)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Send Telegram alerts for new Upwork jobs")
+    parser.add_argument("--worker", action="store_true",
+                        help="share SEARCH_URLS with other copies of this script started with --worker")
+    parser.add_argument("--worker-id", help="stable name for this worker (default: host name and process id)")
+    parser.add_argument("--coordinator", default=COORDINATOR_FILE,
+                        help=f"SQLite file the workers register in (default: {COORDINATOR_FILE})")
+    parser.add_argument("--once", action="store_true",
+                        help="check every search once, deliver the alerts and exit, e.g. from cron or a systemd timer")
+    return parser.parse_args()
+
 
 def main():
+    global TELEGRAM_OUTBOX_FILE
+    args = parse_args()
+
     print("Starting Upwork Job Scraper")
     setup_directories()
     
     job_history = load_job_history()
     print(f"Loaded {len(job_history)} previously seen jobs")
     
-    while True:
-        print("-------------------------------------------")
-        print(f"Starting search at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        print("-------------------------------------------")
-        
-        new_jobs_found = False
-        
-        for url in SEARCH_URLS:
-            print(f"Processing search URL: {url}")
-            jobs = process_search_page(url)
-            
-            for job in jobs:
-                job_uid = job.get('job_uid')
-                if not job_uid:
-                    continue
-                    
-                if job_uid not in job_history:
-                    print(f"Found new job: {job['title']}")
-                    
-                    detailed_job = process_job_posting(job)
-                    
-                    message = create_telegram_message(detailed_job)
-                    send_telegram_message(message)
-                    
-                    job_history.add(job_uid)
-                    new_jobs_found = True
-                else:
-                    print(f"Skipping already seen job: {job['title']}")
+    # Compile the filter rules now so a mistake in FILTER_RULES stops the script straight away
+    get_job_filter()
+    
+    coordinator = None
+    if args.worker or WORKER_MODE:
+        coordinator = Coordinator(args.coordinator, args.worker_id or WORKER_ID or default_worker_id())
+        coordinator.start()
+        TELEGRAM_OUTBOX_FILE = worker_outbox_file(coordinator.worker_id)
+        print(f"Running as worker {coordinator.worker_id}, coordinating through {args.coordinator}")
+    
+    start_metrics()
+    
+    # Start delivering any alerts left over from a previous run straight away
+    get_telegram_sender()
+    
+    scheduler = SearchScheduler(SEARCH_URLS)
+    
+    try:
+        while True:
+            if coordinator is not None:
+                scheduler.assign(coordinator.shard(SEARCH_URLS))
+                # The fetch budget is shared by every worker
+                scheduler.budget = FETCHES_PER_HOUR_BUDGET / len(coordinator.shard_workers)
+            due_urls = scheduler.due_urls()
+            if due_urls:
+                new_jobs_by_url = run_check(job_history, due_urls, coordinator.worker_id if coordinator else None)
+                for url, new_jobs in new_jobs_by_url.items():
+                    scheduler.record_poll(url, new_jobs, search_fingerprints.unchanged_polls(url))
+                scheduler.schedule(due_urls)
+                print(get_telegram_sender().status())
+                print(fetch_path_summary())
+                print(get_proxy_manager().summary())
+                print(filter_summary())
+                print(selector_summary())
+                print(search_fingerprints.summary())
+                print(get_detail_cache().status())
+                get_detail_cache().prune()
             
-            # Small delay between processing different search URLs
-            time.sleep(random.uniform(.2, .9))
+            if args.once:
+                # Telegram's rate limit may still be holding some alerts back, deliver them before exiting
+                get_telegram_sender().flush(ONCE_DELIVERY_TIMEOUT)
+                print(f"Single check finished {time.perf_counter() - PROCESS_START:.1f}s after process start")
+                break
+            if due_urls:
+                print(scheduler.describe())
             
-        if new_jobs_found:
-            save_job_history(job_history)
-            print(f"Job history updated, now tracking {len(job_history)} jobs")
-        
-        # Add a small random delay before next check
-        jitter = random.uniform(0.8, 1.2)
-        wait_time = CHECK_INTERVAL * 60 * jitter
-        next_check_time = datetime.now() + timedelta(seconds=wait_time)
-        print(f"Next check in about {int(wait_time / 60)} minutes at approximately {next_check_time.strftime('%H:%M:%S')}...\n")
-        time.sleep(wait_time)
+            wait_time = scheduler.seconds_until_next()
+            if coordinator is not None:
+                # Wake up in time to notice workers that joined or died
+                wait_time = min(wait_time, WORKER_LEASE_TIMEOUT)
+            next_check_time = datetime.now() + timedelta(seconds=wait_time)
+            if due_urls:
+                print(f"Next check in about {int(wait_time / 60)} minutes at approximately {next_check_time.strftime('%H:%M:%S')}...\n")
+            time.sleep(wait_time)
+    finally:
+        # Warm browsers are kept between checks, so shut them down on exit
+        close_browser_pool()
+        close_telegram_sender()
+        close_artifact_writer()
+        close_job_archive()
+        if coordinator is not None:
+            coordinator.close()
+        job_history.close()
 
 
 if __name__ == "__main__":